@@ -0,0 +1,66 @@
+"""
+并行分析模块
+把逐只股票的分析任务分给多个进程执行：结果按输入顺序返回，
+单只股票出错只记录错误、不影响其他股票
+"""
+
+import math
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# 默认分析进程数（1 表示在当前进程中顺序执行）
+ANALYSIS_WORKERS = 1
+
+
+def _run_isolated(task):
+    """
+    执行单只股票的分析，捕获异常
+
+    Args:
+        task: (分析函数, 股票名称, 参数元组)
+
+    Returns:
+        tuple: (股票名称, 结果, 错误信息)，出错时结果为 None
+    """
+    func, stock_name, args = task
+    try:
+        return stock_name, func(*args), None
+    except Exception as e:
+        traceback.print_exc()
+        return stock_name, None, str(e)
+
+
+def run_per_stock(func, items, workers=ANALYSIS_WORKERS):
+    """
+    对每只股票执行分析函数
+
+    Args:
+        func: 模块级函数或静态方法（需可被 pickle），参数为 items 中的参数元组
+        items: [(股票名称, 参数元组)]
+        workers: 进程数，1 表示顺序执行
+
+    Returns:
+        list: [(股票名称, 结果)]，与 items 顺序一致，出错的股票不在其中
+    """
+    tasks = [(func, stock_name, args) for stock_name, args in items]
+    if workers <= 1 or len(tasks) <= 1:
+        outcomes = map(_run_isolated, tasks)
+        return _collect(outcomes)
+
+    # 每个进程分几批领取任务，减少进程间通信次数
+    chunksize = max(1, math.ceil(len(tasks) / (workers * 4)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return _collect(executor.map(_run_isolated, tasks, chunksize=chunksize))
+
+
+def _collect(outcomes):
+    """
+    汇总结果并打印出错的股票
+    """
+    results = []
+    for stock_name, result, error in outcomes:
+        if error is not None:
+            print(f"分析股票 {stock_name} 时出错: {error}")
+            continue
+        results.append((stock_name, result))
+    return results
@@ -0,0 +1,272 @@
+"""
+信号回测模块
+用股票池的全部历史检验 BOLL 接近信号和 analyze_stock_status 得分状态：
+每个信号出现后持有 N 个交易日的收益、胜率和期间最大回撤，按信号和板块统计
+
+信号、得分、远期收益都按整段历史的数组一次算出，不逐日模拟
+"""
+
+import numpy as np
+import pandas as pd
+from stock_store import StockDataStore
+from range_extrema import RangeExtrema
+from pattern_scanner import scan_bottom_patterns, scan_boll_touch, BOLL_SIGNALS
+from support_buy_scanner import BOLL_WIN, BOLL_K, TOL
+# 得分参数和得分状态（与 analyze_stock_status 共用）
+from score_params import (HIGH_LOOKBACK, PERFECT_HIGH_TOL, NEAR_HIGH_RATIO, MA_ENTANGLE, DIVERGENCE_LAG,
+                          DIVERGENCE_STRONG, DIVERGENCE_MEDIUM, CLOSE_STRENGTH_RATIO, RECENT_DAYS, ARC_LOW_DIFF,
+                          SCORE_LEVELS, LOWEST_LEVEL, current_score_params)
+
+# 持有天数
+HORIZONS = (5, 10, 20)
+
+# 均线粘合阈值（与 check_ma_converge 默认值相同）
+CONVERGE_THRESHOLD = 0.01
+CONVERGE_SIGNAL = '均线粘合'
+
+SIGNAL_ORDER = BOLL_SIGNALS + (CONVERGE_SIGNAL,) + tuple(label for _, label in SCORE_LEVELS) + (LOWEST_LEVEL,)
+
+RESULT_COLUMNS = ['板块', 'signal', 'horizon', '次数', '胜率', '平均收益', '中位收益', '平均回撤', '最大回撤']
+
+
+def score_history(closes, perfect_high_tol=PERFECT_HIGH_TOL, near_high_ratio=NEAR_HIGH_RATIO,
+                  ma_entangle=MA_ENTANGLE, arc_low_diff=ARC_LOW_DIFF):
+    """
+    在每个交易日上计算 analyze_stock_status 的得分（以该日及之前的数据为输入）
+
+    Args:
+        closes: 收盘价（按时间升序）
+        perfect_high_tol: 完美新高的误差
+        near_high_ratio: 接近新高的比例
+        ma_entangle: 均线缠绕的差值上限
+        arc_low_diff: 圆弧底相邻低点差值上限
+
+    Returns:
+        ndarray: 与 closes 等长的得分，不足60天的日期为 NaN
+    """
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    scores = np.full(n, np.nan)
+    if n < RECENT_DAYS:
+        return scores
+
+    series = pd.Series(closes)
+    ma5 = series.rolling(5, min_periods=1).mean().to_numpy()
+    ma10 = series.rolling(10, min_periods=1).mean().to_numpy()
+    ma20 = series.rolling(20, min_periods=1).mean().to_numpy()
+    high = series.rolling(HIGH_LOOKBACK, min_periods=1).max().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 阶段新高
+        perfect_high = np.abs(closes - high) / high <= perfect_high_tol
+        near_high = closes >= high * near_high_ratio
+
+        # 均线结构基础分
+        strong = (ma5 > ma10) & (ma10 > ma20) & (closes > ma5) & (closes > ma10) & (closes > ma20)
+        entangle = ((np.abs(ma5 - ma10) / ma10 < ma_entangle) & (np.abs(ma10 - ma20) / ma20 < ma_entangle)
+                    & (np.abs(ma5 - ma20) / ma20 < ma_entangle))
+        bearish = (ma20 > ma10) & (ma10 > ma5)
+        basic = np.select([strong, entangle, bearish], [25, 10, 0], default=5)
+
+        # 加分项：多头发散度（与10天前的均线比较）和收盘价站均线强度，仅强势多头
+        def slope(ma):
+            result = np.zeros(n)
+            previous = ma[:-DIVERGENCE_LAG]
+            result[DIVERGENCE_LAG:] = np.where(previous != 0, (ma[DIVERGENCE_LAG:] - previous) / previous, 0)
+            return result
+
+        slope5, slope10, slope20 = slope(ma5), slope(ma10), slope(ma20)
+        diverging = (slope5 > slope10) & (slope10 > slope20) & (slope20 > 0)
+        slope_diff = slope5 - slope20
+        divergence = np.where(diverging, np.select([slope_diff >= DIVERGENCE_STRONG, slope_diff >= DIVERGENCE_MEDIUM],
+                                                   [12, 6], default=0), 0)
+        close_strength = (3 * (closes > ma5 * CLOSE_STRENGTH_RATIO) + 3 * (closes > ma10 * CLOSE_STRENGTH_RATIO)
+                          + 2 * (closes > ma20 * CLOSE_STRENGTH_RATIO))
+        bonus = np.where(strong, divergence + close_strength, 0)
+
+    # 底部形态
+    patterns = scan_bottom_patterns(closes, arc_low_diff)
+    bottom = 10 * (patterns['V型底'].astype(int) + patterns['W型底'].astype(int) + patterns['圆弧底'].astype(int))
+
+    total = np.select([perfect_high, near_high], [100, 80], default=basic + bonus + bottom)
+    scores[RECENT_DAYS - 1:] = total[RECENT_DAYS - 1:]
+    return scores
+
+
+def converge_history(closes, threshold=CONVERGE_THRESHOLD):
+    """
+    在每个交易日上判断5日、10日、20日均线是否粘合（与 check_ma_converge 相同）
+
+    Args:
+        closes: 收盘价（按时间升序）
+        threshold: 粘合阈值
+
+    Returns:
+        ndarray: 与 closes 等长的布尔数组，均线未形成的日期为 False
+    """
+    series = pd.Series(np.asarray(closes, dtype=float))
+    mas = np.column_stack([series.rolling(window).mean().to_numpy() for window in (5, 10, 20)])
+    with np.errstate(invalid='ignore'):
+        return (mas.max(axis=1) - mas.min(axis=1)) / (mas.sum(axis=1) / 3) <= threshold
+
+
+def score_status(scores):
+    """
+    得分转换为状态
+
+    Args:
+        scores: 得分数组
+
+    Returns:
+        ndarray: 状态数组，得分为 NaN 时为 None
+    """
+    scores = np.asarray(scores, dtype=float)
+    with np.errstate(invalid='ignore'):
+        status = np.select([scores >= level for level, _ in SCORE_LEVELS],
+                           [label for _, label in SCORE_LEVELS], default=LOWEST_LEVEL).astype(object)
+    status[np.isnan(scores)] = None
+    return status
+
+
+def forward_returns(closes, horizon):
+    """
+    每个交易日买入、持有 horizon 个交易日的收益和期间最大回撤
+
+    Args:
+        closes: 收盘价（按时间升序）
+        horizon: 持有天数
+
+    Returns:
+        tuple: (收益, 回撤)，与 closes 等长，持有期超出历史的日期为 NaN
+               回撤为持有期内最低收盘价相对买入价的跌幅（≤0）
+    """
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    returns = np.full(n, np.nan)
+    drawdowns = np.full(n, np.nan)
+    if n <= horizon:
+        return returns, drawdowns
+
+    entry = np.arange(n - horizon)
+    returns[entry] = closes[entry + horizon] / closes[entry] - 1
+    lowest = RangeExtrema(closes).min_table.query_many(entry + 1, entry + horizon)
+    drawdowns[entry] = np.minimum(lowest / closes[entry] - 1, 0)
+    return returns, drawdowns
+
+
+def signal_events(history_df, horizons=HORIZONS, win=BOLL_WIN, k=BOLL_K, tol=TOL,
+                  converge_threshold=CONVERGE_THRESHOLD):
+    """
+    单只股票的全部信号事件及其远期表现
+
+    Args:
+        history_df: 行情数据（含 trade_date, close, low，任意顺序）
+        horizons: 持有天数列表
+        win: BOLL 窗口
+        k: BOLL 带宽倍数
+        tol: 接近容差
+        converge_threshold: 均线粘合阈值
+
+    Returns:
+        DataFrame: signal, trade_date, horizon, return, drawdown
+    """
+    history_df = history_df.sort_values('trade_date').reset_index(drop=True)
+    closes = history_df['close'].to_numpy(dtype=float)
+    dates = history_df['trade_date'].to_numpy()
+
+    # 每个交易日的信号：BOLL 接近信号 + 均线粘合 + 得分状态（与每日评分使用相同的得分参数）
+    masks = scan_boll_touch(history_df, win, k, tol)
+    masks[CONVERGE_SIGNAL] = converge_history(closes, converge_threshold)
+    status = score_status(score_history(closes, **current_score_params()))
+    for _, label in SCORE_LEVELS + ((None, LOWEST_LEVEL),):
+        masks[label] = status == label
+
+    names = list(masks.keys())
+    rows, cols = np.nonzero(np.column_stack([masks[name] for name in names]))
+    signals = np.array(names, dtype=object)[cols]
+
+    events = []
+    for horizon in horizons:
+        returns, drawdowns = forward_returns(closes, horizon)
+        valid = ~np.isnan(returns[rows])
+        events.append(pd.DataFrame({
+            'signal': signals[valid],
+            'trade_date': dates[rows][valid],
+            'horizon': horizon,
+            'return': returns[rows][valid],
+            'drawdown': drawdowns[rows][valid],
+        }))
+    return pd.concat(events, ignore_index=True)
+
+
+def summarize(events):
+    """
+    按板块、信号、持有天数统计，另附 板块="全部" 的汇总
+
+    Args:
+        events: 含 板块, signal, horizon, return, drawdown 的事件表
+
+    Returns:
+        DataFrame: 回测结果
+    """
+    if events.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    overall = events.assign(板块='全部')
+    grouped = pd.concat([overall, events], ignore_index=True).groupby(['板块', 'signal', 'horizon'], sort=False)
+    result = grouped.agg(
+        次数=('return', 'size'),
+        胜率=('return', lambda r: (r > 0).mean()),
+        平均收益=('return', 'mean'),
+        中位收益=('return', 'median'),
+        平均回撤=('drawdown', 'mean'),
+        最大回撤=('drawdown', 'min'),
+    ).reset_index()
+
+    # 板块按出现顺序（"全部"在前），信号按 BOLL 信号、均线粘合、得分状态从高到低排列
+    order = {name: i for i, name in enumerate(SIGNAL_ORDER)}
+    result['_plate'] = pd.factorize(result['板块'])[0]
+    result['_signal'] = result['signal'].map(order)
+    result = result.sort_values(['_plate', '_signal', 'horizon'], kind='stable')
+    return result[RESULT_COLUMNS].reset_index(drop=True)
+
+
+def run_backtest(data_store=None, stock_names=None, horizons=HORIZONS, win=BOLL_WIN, k=BOLL_K, tol=TOL,
+                 converge_threshold=CONVERGE_THRESHOLD):
+    """
+    回测数据存储中全部（或指定）股票
+
+    Args:
+        data_store: 股票数据存储，默认为 stocks_data 目录
+        stock_names: 股票名称列表，None 表示全部
+        horizons: 持有天数列表
+        win: BOLL 窗口
+        k: BOLL 带宽倍数
+        tol: 接近容差
+        converge_threshold: 均线粘合阈值
+
+    Returns:
+        DataFrame: 回测结果
+    """
+    data_store = data_store if data_store is not None else StockDataStore()
+    tables = []
+    for stock_name, plate, history_df in data_store.iter_histories(
+            stock_names, columns=['ts_code', 'trade_date', 'close', 'low']):
+        try:
+            events = signal_events(history_df, horizons, win, k, tol, converge_threshold)
+        except Exception as e:
+            print(f"回测 {stock_name} 时出错: {e}")
+            continue
+        events.insert(0, '板块', plate)
+        tables.append(events)
+
+    events = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(
+        columns=['板块', 'signal', 'trade_date', 'horizon', 'return', 'drawdown'])
+    return summarize(events)
+
+
+if __name__ == "__main__":
+    result = run_backtest()
+    result.to_csv('backtest_results.csv', index=False, encoding='utf-8-sig')
+    print(result[result['板块'] == '全部'].to_string(index=False))
+    print("回测结果已保存到 backtest_results.csv")
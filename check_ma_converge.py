@@ -1,4 +1,5 @@
 import pandas as pd
+from indicator_engine import IndicatorPanel
 
 def check_ma_converge(df, threshold=0.01):
     """
@@ -7,10 +8,12 @@ def check_ma_converge(df, threshold=0.01):
     :param threshold: 粘合阈值，默认为1%（0.01）
     :return: 字典，包含粘合状态和多头排列状态
     """
-    # 计算均线
-    df['ma5'] = df['close'].rolling(window=5).mean()
-    df['ma10'] = df['close'].rolling(window=10).mean()
-    df['ma20'] = df['close'].rolling(window=20).mean()
+    # 计算均线（已由指标面板计算时直接使用）
+    if not {'ma5', 'ma10', 'ma20'}.issubset(df.columns):
+        panel = IndicatorPanel.single(df)
+        df['ma5'] = panel.column(panel.ma(5))
+        df['ma10'] = panel.column(panel.ma(10))
+        df['ma20'] = panel.column(panel.ma(20))
 
     # 取最近一天的三条均线
     last_ma5 = df['ma5'].iloc[-1]
@@ -0,0 +1,119 @@
+"""
+每日处理流程模块
+一次读取数据存储，对每只股票一次完成 BOLL 接近、均线粘合（watch 工作表）和趋势评分（trend 工作表），
+两个工作表的写入和格式化在同一个工作簿会话中完成
+"""
+
+import pandas as pd
+from excel_handler import ExcelHandler, WorkbookSaveError
+from stock_store import StockDataStore
+from stock_processor import StockDataProcessor, WATCH_HISTORY_COLUMNS
+from xgboost import StockDataManager, TREND_HISTORY_COLUMNS
+from rolling_state import IndicatorStateBook
+from analysis_pool import run_per_stock, ANALYSIS_WORKERS
+
+# 一次读取 watch 和 trend 需要的全部行情列
+DAILY_HISTORY_COLUMNS = list(dict.fromkeys(WATCH_HISTORY_COLUMNS + TREND_HISTORY_COLUMNS))
+
+
+def analyze_daily(stock_name, plate, watch_df, trend_df, ma_snapshot=None):
+    """
+    单只股票的全部分析（可在子进程中执行）
+
+    Args:
+        stock_name: 股票名称
+        plate: 板块名称
+        watch_df: watch 工作表的分析数据
+        trend_df: 趋势评分的分析数据，数据不足时为 None
+        ma_snapshot: 滚动均线状态的快照，None 表示使用 trend_df 中的均线列
+
+    Returns:
+        tuple: (watch 行, 趋势评分结果或 None)
+    """
+    watch_row = StockDataProcessor._analyze_watch_row(stock_name, plate, watch_df)
+    trend_result = None
+    if trend_df is not None:
+        trend_result = StockDataManager.analyze_stock_status(trend_df, stock_name, plate, ma_snapshot)
+    return watch_row, trend_result
+
+
+class DailyPipeline:
+    """每日处理流程：watch 和 trend 工作表一次完成"""
+
+    def __init__(self, file_path, data_store=None):
+        """
+        Args:
+            file_path: Excel文件路径
+            data_store: 股票数据存储，默认为 stocks_data 目录
+        """
+        self.excel_handler = ExcelHandler(file_path)
+        self.data_store = data_store if data_store is not None else StockDataStore()
+
+    def run(self, source_sheet_name="pool", watch_sheet_name="watch", trend_sheet_name="trend",
+            workers=ANALYSIS_WORKERS, export_path=None):
+        """
+        执行每日处理
+
+        Args:
+            source_sheet_name: 股票池工作表名称（读取核心股票）
+            watch_sheet_name: watch 工作表名称
+            trend_sheet_name: trend 工作表名称
+            workers: 分析使用的进程数，1 表示顺序执行
+            export_path: 流式导出的文件路径；指定时 watch 和 trend 逐行写入该文件（格式在写入时设置），
+                原工作簿不修改
+
+        Returns:
+            tuple: (watch 数据, trend 数据)
+
+        Raises:
+            WorkbookSaveError: 数据写入失败，工作簿（或导出文件）未保存
+        """
+        # 只读取一次数据存储
+        histories = list(self.data_store.iter_histories(columns=DAILY_HISTORY_COLUMNS))
+        watch_frames = StockDataProcessor.prepare_watch_frames(
+            (stock_name, plate, df[WATCH_HISTORY_COLUMNS]) for stock_name, plate, df in histories)
+        trend_frames = StockDataManager.prepare_trend_frames(
+            histories, IndicatorStateBook(self.data_store.store_dir))
+
+        # 每只股票一次完成全部分析
+        items = [(stock_name, (stock_name, plate, watch_df) + trend_frames.get(stock_name, (None, None, None))[1:])
+                 for stock_name, (plate, watch_df) in watch_frames.items()]
+        results = run_per_stock(analyze_daily, items, workers)
+
+        watch_rows = [watch_row for _, (watch_row, _) in results]
+        trend_results = [trend_result for _, (_, trend_result) in results if trend_result is not None]
+
+        sheets = {}
+        watch_df = StockDataProcessor._build_watch_table(watch_rows) if watch_rows else pd.DataFrame()
+        if not watch_df.empty:
+            sheets[watch_sheet_name] = watch_df
+        trend_df = pd.DataFrame(trend_results)
+        if not trend_df.empty:
+            trend_df = trend_df.sort_values('得分', ascending=False)
+            sheets[trend_sheet_name] = trend_df
+
+        if not sheets:
+            print("没有数据需要写入")
+            return watch_df, trend_df
+
+        if export_path:
+            # 流式导出：写入时同时完成格式化和核心股票高亮
+            core_stocks = self.excel_handler.read_core_stocks(source_sheet_name)
+            if not self.excel_handler.export_sheets(sheets, export_path, format_sheets=(watch_sheet_name,),
+                                                    core_stocks=core_stocks):
+                raise WorkbookSaveError(f"流式导出到 {export_path} 失败")
+            print(f"每日处理完成，watch {len(watch_df)} 只股票，trend {len(trend_df)} 只股票")
+            return watch_df, trend_df
+
+        # 数据写入、格式化和核心股票高亮在同一个工作簿会话中完成，文件只打开、保存一次；
+        # 数据写入失败时会话抛出 WorkbookSaveError，格式化失败时数据照常保存
+        with self.excel_handler.session():
+            self.excel_handler.save_sheets(sheets)
+            if watch_sheet_name in sheets:
+                self.excel_handler.format_worksheet(watch_sheet_name)
+                self.excel_handler.highlight_core_stocks(source_sheet_name, watch_sheet_name)
+        if self.excel_handler.format_errors:
+            print(f"每日处理完成，数据已保存，但有 {len(self.excel_handler.format_errors)} 处格式化错误: "
+                  f"{'; '.join(self.excel_handler.format_errors)}")
+        print(f"每日处理完成，watch {len(watch_df)} 只股票，trend {len(trend_df)} 只股票")
+        return watch_df, trend_df
@@ -0,0 +1,365 @@
+"""
+行情数据源模块
+统一 Tushare / AkShare / Baostock 三个数据源的日线接口，输出相同的字段格式，
+并按测得的延迟和可用额度自动选择数据源，某个数据源出错或额度用尽时自动切换到下一个
+"""
+
+import time
+import threading
+import pandas as pd
+import akshare as ak
+import baostock as bs
+from rate_limiter import RateLimiter, is_throttle_error
+
+# 统一的日线字段（与 Tushare daily 接口一致：vol 单位为手，amount 单位为千元）
+OHLCV_COLUMNS = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close',
+                 'pre_close', 'change', 'pct_chg', 'vol', 'amount']
+
+# 出错后暂停使用该数据源的秒数
+QUOTA_COOLDOWN = 60.0
+ERROR_COOLDOWN = 30.0
+MAX_COOLDOWN = 300.0
+
+# AkShare（东方财富）每分钟请求数上限，请求过快会被封禁 IP
+AKSHARE_RATE_PER_MINUTE = 120
+
+
+class QuotaExceededError(Exception):
+    """数据源额度用尽"""
+
+
+class NoDataError(Exception):
+    """数据源未返回数据"""
+
+
+def normalize_ohlcv(df):
+    """
+    整理为统一的日线字段：补齐缺失列、数值列转为浮点数、按交易日期降序排列
+
+    Args:
+        df: 已按统一字段命名的 DataFrame
+
+    Returns:
+        DataFrame: 统一格式的日线数据
+    """
+    df = df.copy()
+    for column in OHLCV_COLUMNS:
+        if column not in df.columns:
+            df[column] = float('nan')
+    for column in OHLCV_COLUMNS[2:]:
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    if df['pre_close'].isna().all() and df['change'].notna().any():
+        df['pre_close'] = df['close'] - df['change']
+    if df['change'].isna().all() and df['pre_close'].notna().any():
+        df['change'] = df['close'] - df['pre_close']
+    df = df[OHLCV_COLUMNS].sort_values('trade_date', ascending=False)
+    return df.reset_index(drop=True)
+
+
+class DataSource:
+    """数据源基类"""
+
+    name = "base"
+
+    def get_daily(self, ts_code, start_date, end_date):
+        """
+        获取日线数据
+
+        Args:
+            ts_code: Tushare 格式股票代码，如 '600000.SH'
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+
+        Returns:
+            DataFrame: 统一格式的日线数据（交易日期降序）
+        """
+        raise NotImplementedError
+
+    def get_trade_calendar(self):
+        """
+        获取全部交易日
+
+        Returns:
+            list: 交易日列表，格式 YYYYMMDD（升序）
+        """
+        raise NotImplementedError
+
+    def has_quota(self):
+        """
+        当前是否还有可用额度
+        """
+        return True
+
+    def queued_time(self):
+        """
+        当前线程上一次调用中排队等待限流的秒数（路由统计延迟时扣除）
+        """
+        return 0.0
+
+
+class RateLimitedSource(DataSource):
+    """经限流器调用接口的数据源"""
+
+    def __init__(self, rate_limiter):
+        """
+        Args:
+            rate_limiter: 该数据源的限流器
+        """
+        self.rate_limiter = rate_limiter
+        self._local = threading.local()
+
+    def _limited(self, func, *args, **kwargs):
+        """
+        经限流器调用接口，遇到限流错误时降速并抛出 QuotaExceededError，交给路由切换数据源
+        """
+        self._local.queued = self.rate_limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if is_throttle_error(e):
+                self.rate_limiter.on_throttled()
+                raise QuotaExceededError(str(e))
+            raise
+        self.rate_limiter.on_success()
+        return result
+
+    def has_quota(self):
+        # 令牌不足时 acquire 会等待，只有遇到限流错误才算额度用尽
+        return not self.rate_limiter.is_throttled()
+
+    def queued_time(self):
+        return getattr(self._local, "queued", 0.0)
+
+
+class TushareSource(RateLimitedSource):
+    """Tushare 数据源"""
+
+    name = "tushare"
+
+    def __init__(self, pro, rate_limiter):
+        """
+        Args:
+            pro: Tushare pro_api 对象
+            rate_limiter: 与其他 Tushare 调用共享的限流器
+        """
+        super().__init__(rate_limiter)
+        self.pro = pro
+
+    def _call(self, api_name, **kwargs):
+        """
+        经限流器调用 Tushare 接口
+        """
+        return self._limited(getattr(self.pro, api_name), **kwargs)
+
+    def get_daily(self, ts_code, start_date, end_date):
+        df = self._call('daily', ts_code=ts_code, start_date=start_date, end_date=end_date)
+        if df is None or df.empty:
+            raise NoDataError(f"{ts_code} 无数据")
+        return normalize_ohlcv(df)
+
+    def get_trade_calendar(self):
+        df = self._call('trade_cal', exchange='SSE', is_open='1')
+        return sorted(df['cal_date'].astype(str).tolist())
+
+
+class AkShareSource(RateLimitedSource):
+    """AkShare 数据源（东方财富日线，不复权），请求过快会被封禁，经限流器调用"""
+
+    name = "akshare"
+
+    def __init__(self, rate_limiter=None):
+        """
+        Args:
+            rate_limiter: 限流器，默认按 AKSHARE_RATE_PER_MINUTE 新建
+        """
+        super().__init__(rate_limiter if rate_limiter is not None else RateLimiter(AKSHARE_RATE_PER_MINUTE))
+
+    def get_daily(self, ts_code, start_date, end_date):
+        code = ts_code.split('.')[0]
+        df = self._limited(ak.stock_zh_a_hist, symbol=code, period="daily",
+                           start_date=start_date, end_date=end_date, adjust="")
+        if df is None or df.empty:
+            raise NoDataError(f"{ts_code} 无数据")
+        df = df.rename(columns={
+            '日期': 'trade_date', '开盘': 'open', '最高': 'high', '最低': 'low', '收盘': 'close',
+            '涨跌额': 'change', '涨跌幅': 'pct_chg', '成交量': 'vol', '成交额': 'amount'
+        })
+        df['ts_code'] = ts_code
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.strftime('%Y%m%d')
+        # 成交额：元 -> 千元
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce') / 1000
+        return normalize_ohlcv(df)
+
+    def get_trade_calendar(self):
+        trade_df = self._limited(ak.tool_trade_date_hist_sina)
+        return sorted(pd.to_datetime(trade_df['trade_date']).dt.strftime('%Y%m%d').tolist())
+
+
+class BaostockSource(DataSource):
+    """Baostock 数据源（接口非线程安全，调用时加锁）"""
+
+    name = "baostock"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._logged_in = False
+
+    def _login(self):
+        if not self._logged_in:
+            result = bs.login()
+            if result.error_code != "0":
+                raise ConnectionError(f"Baostock 登录失败: {result.error_msg}")
+            self._logged_in = True
+
+    def _query(self, rs):
+        if rs.error_code != "0":
+            # 会话失效时下次调用重新登录
+            self._logged_in = False
+            raise ConnectionError(f"Baostock 查询失败: {rs.error_msg}")
+        rows = []
+        while rs.next():
+            rows.append(rs.get_row_data())
+        return pd.DataFrame(rows, columns=rs.fields)
+
+    def get_daily(self, ts_code, start_date, end_date):
+        code, exchange = ts_code.split('.')
+        fields = "date,open,high,low,close,preclose,volume,amount,pctChg,tradestatus"
+        with self._lock:
+            self._login()
+            df = self._query(bs.query_history_k_data_plus(
+                f"{exchange.lower()}.{code}", fields,
+                start_date=f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:]}",
+                end_date=f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:]}",
+                frequency="d", adjustflag="3"
+            ))
+        # 停牌日 Baostock 也返回一行（成交量为0、收盘价等于昨收），Tushare、AkShare 不返回，去掉以保持一致
+        if not df.empty:
+            df = df[df['tradestatus'] == "1"]
+        if df.empty:
+            raise NoDataError(f"{ts_code} 无数据")
+        df = df.rename(columns={'date': 'trade_date', 'preclose': 'pre_close', 'pctChg': 'pct_chg'})
+        df['ts_code'] = ts_code
+        df['trade_date'] = df['trade_date'].str.replace('-', '')
+        # 成交量：股 -> 手；成交额：元 -> 千元
+        df['vol'] = pd.to_numeric(df['volume'], errors='coerce') / 100
+        df['amount'] = pd.to_numeric(df['amount'], errors='coerce') / 1000
+        return normalize_ohlcv(df)
+
+    def get_trade_calendar(self):
+        with self._lock:
+            self._login()
+            df = self._query(bs.query_trade_dates(start_date="1990-12-19"))
+        df = df[df['is_trading_day'] == "1"]
+        return sorted(df['calendar_date'].str.replace('-', '').tolist())
+
+
+class DataSourceRouter(DataSource):
+    """
+    数据源路由
+    优先选择有额度且平均延迟最低的数据源，出错的数据源暂停使用一段时间；
+    未测得延迟的数据源排在已测得的之后（按列表顺序），只在前面的数据源出错或额度用尽时才试用，
+    数据源正常时不会把请求分给备用数据源
+    """
+
+    name = "router"
+
+    def __init__(self, sources, alpha=0.3):
+        """
+        Args:
+            sources: 数据源列表，延迟相同时按列表顺序优先
+            alpha: 延迟指数移动平均的平滑系数
+        """
+        self.sources = list(sources)
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._stats = {
+            source.name: {"latency": None, "failures": 0, "cooldown_until": 0.0}
+            for source in self.sources
+        }
+
+    def _candidates(self):
+        """
+        按可用性、额度和延迟排序的数据源列表
+        """
+        now = time.monotonic()
+        with self._lock:
+            quota = {source.name: source.has_quota() for source in self.sources}
+
+            def sort_key(item):
+                priority, source = item
+                stats = self._stats[source.name]
+                cooling = stats["cooldown_until"] > now
+                # 未测得延迟的数据源排在已测得的之后，只在前面的数据源失败时才试用
+                unmeasured = stats["latency"] is None
+                latency = 0.0 if unmeasured else stats["latency"]
+                return (cooling, not quota[source.name], unmeasured, latency, priority)
+            return [source for _, source in sorted(enumerate(self.sources), key=sort_key)]
+
+    def _record_success(self, source, elapsed):
+        with self._lock:
+            stats = self._stats[source.name]
+            if stats["latency"] is None:
+                stats["latency"] = elapsed
+            else:
+                stats["latency"] = self.alpha * elapsed + (1 - self.alpha) * stats["latency"]
+            stats["failures"] = 0
+            stats["cooldown_until"] = 0.0
+
+    def _record_failure(self, source, error):
+        with self._lock:
+            stats = self._stats[source.name]
+            stats["failures"] += 1
+            if isinstance(error, QuotaExceededError):
+                cooldown = QUOTA_COOLDOWN
+            else:
+                cooldown = min(MAX_COOLDOWN, ERROR_COOLDOWN * stats["failures"])
+            stats["cooldown_until"] = time.monotonic() + cooldown
+
+    def _route(self, method, *args):
+        """
+        依次尝试各数据源，返回第一个成功的结果
+        """
+        last_error = None
+        all_empty = True
+        for source in self._candidates():
+            start = time.monotonic()
+            try:
+                result = getattr(source, method)(*args)
+            except NoDataError as e:
+                # 无数据不代表数据源故障，不暂停使用
+                last_error = e
+                continue
+            except Exception as e:
+                print(f"数据源 {source.name} 调用失败，切换数据源: {e}")
+                self._record_failure(source, e)
+                last_error = e
+                all_empty = False
+                continue
+            # 延迟只统计数据源本身的响应时间，不含排队等待限流的时间
+            self._record_success(source, time.monotonic() - start - source.queued_time())
+            return result
+
+        if last_error is None:
+            raise RuntimeError("没有可用的数据源")
+        if all_empty:
+            raise NoDataError(str(last_error))
+        raise last_error
+
+    def get_daily(self, ts_code, start_date, end_date):
+        return self._route('get_daily', ts_code, start_date, end_date)
+
+    def get_trade_calendar(self):
+        return self._route('get_trade_calendar')
+
+    def has_quota(self):
+        return any(source.has_quota() for source in self.sources)
+
+    def stats(self):
+        """
+        各数据源的延迟和失败统计
+
+        Returns:
+            dict: {数据源名称: 统计信息}
+        """
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
@@ -3,16 +3,57 @@ Excel处理模块
 负责Excel文件的读写、格式化和样式设置
 """
 
+import os
+import numpy as np
 import pandas as pd
 import openpyxl
-from openpyxl import load_workbook
-from openpyxl.styles import Font
+from copy import copy
+from contextlib import contextmanager
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+from openpyxl.styles.differential import DifferentialStyle
+from openpyxl.formatting.rule import Rule
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.utils import get_column_letter, column_index_from_string
 from openpyxl.worksheet.dimensions import ColumnDimension
 from config import (
     COLUMN_WIDTHS, COLOR_RULES, LIGHT_RED, DARK_RED, BRIGHT_RED, 
     LIGHT_GREEN, DARK_GREEN
 )
 
+# 颜色区间（Excel 条件格式），按顺序匹配，第一个满足的规则生效，例如：
+#   COLOR_RANGES = [
+#       ('>=', 9.9, BRIGHT_RED),
+#       ('>=', 5, DARK_RED),
+#       ('between', (-5, -2), LIGHT_GREEN),
+#   ]
+# 比较符支持 '>', '>=', '<', '<=', '=', 'between'（含两端）
+# config.py 未配置时按 COLOR_RULES 逐个单元格着色
+try:
+    from config import COLOR_RANGES
+except ImportError:
+    COLOR_RANGES = None
+
+# 不参与颜色编码的列（收盘价）
+COLOR_SKIP_COLUMN = 'I'
+
+# 股票详情页（同花顺），代码为6位数字
+STOCK_PAGE_URL = "https://stockpage.10jqka.com.cn/{code}/"
+
+# 核心股票名称的字体（红色加粗）
+CORE_STOCK_FONT = Font(color="FF0000", bold=True)
+
+# 表头样式（与 pandas to_excel 写出的表头相同：加粗、细边框、水平居中）
+HEADER_FONT = Font(bold=True)
+HEADER_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                       top=Side(style='thin'), bottom=Side(style='thin'))
+HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+
+class WorkbookSaveError(Exception):
+    """数据写入失败，工作簿未保存"""
+
 class ExcelHandler:
     """Excel文件处理器"""
     
@@ -24,19 +65,251 @@ class ExcelHandler:
             file_path: Excel文件路径
         """
         self.file_path = file_path
+        # 工作簿会话中打开的工作簿（不在会话中时为 None）
+        self._workbook = None
+        # 会话中数据写入失败的错误信息，有错误时会话结束不保存
+        self._session_errors = []
+        # 最近一次会话中格式化失败的错误信息（不影响保存，数据照常写入）
+        self.format_errors = []
+        # 读取缓存：文件的 (路径, 修改时间, 大小) 和已读取的工作表
+        self._cache_key = None
+        self._sheet_cache = None
+    
+    @contextmanager
+    def session(self):
+        """
+        工作簿会话：文件只打开一次，会话内的数据写入和格式化都在内存中完成，正常退出时保存一次；
+        会话内抛出异常时不保存，数据写入失败时不保存并抛出 WorkbookSaveError，文件保持原样；
+        格式化（颜色、超链接、列宽、核心股票高亮）失败时数据照常保存，错误记录在 format_errors 中
+
+        用法：
+            with excel_handler.session():
+                excel_handler.append_data_to_sheet(df, "watch")
+                excel_handler.format_worksheet("watch")
+        """
+        if self._workbook is not None:
+            # 嵌套会话沿用外层会话
+            yield self
+            return
+
+        self._workbook = load_workbook(self.file_path)
+        self._session_errors = []
+        self.format_errors = []
+        try:
+            yield self
+            if self._session_errors:
+                raise WorkbookSaveError(
+                    f"工作簿会话中有 {len(self._session_errors)} 处数据写入错误，未保存，文件保持原样: "
+                    f"{self.file_path}（{'; '.join(self._session_errors)}）")
+            self._workbook.save(self.file_path)
+            self._invalidate_cache()
+            print(f"工作簿已保存: {self.file_path}")
+        finally:
+            self._workbook.close()
+            self._workbook = None
+    
+    def _write_failed(self, message):
+        """
+        报告数据写入错误：会话中同时记录下来，会话结束时不保存半途写入的工作簿
+        
+        Args:
+            message: 错误信息
+        """
+        print(message)
+        if self._workbook is not None:
+            self._session_errors.append(message)
+    
+    def _format_failed(self, message):
+        """
+        报告格式化错误：会话中记录到 format_errors，不影响数据保存
+        
+        Args:
+            message: 错误信息
+        """
+        print(message)
+        if self._workbook is not None:
+            self.format_errors.append(message)
+    
+    def _load_workbook(self):
+        """
+        获取工作簿：会话中返回已打开的工作簿，否则从文件加载
+        """
+        if self._workbook is not None:
+            return self._workbook
+        return load_workbook(self.file_path)
+    
+    def _save_workbook(self, wb):
+        """
+        保存工作簿：会话中的工作簿在会话结束时统一保存
+        """
+        if wb is not self._workbook:
+            wb.save(self.file_path)
+            self._invalidate_cache()
+    
+    def _close_workbook(self, wb):
+        """
+        关闭工作簿：会话中的工作簿在会话结束时统一关闭
+        """
+        if wb is not self._workbook:
+            wb.close()
+    
+    def _file_key(self):
+        """
+        文件的缓存键：路径、修改时间和大小，文件被其他程序修改后键随之改变
+        """
+        stat = os.stat(self.file_path)
+        return os.path.abspath(self.file_path), stat.st_mtime_ns, stat.st_size
+    
+    def _invalidate_cache(self):
+        """
+        清除读取缓存（本处理器写入文件后调用）
+        """
+        self._cache_key = None
+        self._sheet_cache = None
+    
+    def _cached_sheet(self, sheet_name, columns=None):
+        """
+        从读取缓存获取工作表：文件未变化时直接返回，否则重新读取
+        
+        Args:
+            sheet_name: 工作表名称
+            columns: 只返回这些列，None 表示全部列
+            
+        Returns:
+            DataFrame: 工作表数据（副本，调用方修改不影响缓存）
+        """
+        key = self._file_key()
+        if key != self._cache_key:
+            self._sheet_cache = {}
+            self._cache_key = key
+        if sheet_name not in self._sheet_cache:
+            self._sheet_cache[sheet_name] = self._load_sheet(sheet_name)
+        df = self._sheet_cache[sheet_name]
+        return (df if columns is None else df[list(columns)]).copy()
+    
+    def _load_sheet(self, sheet_name):
+        """
+        以只读模式读取工作表的值：逐行读取单元格的值，不创建单元格对象和样式，
+        其他工作表不解析，比 pd.read_excel 的默认方式快得多
+        
+        Args:
+            sheet_name: 工作表名称
+            
+        Returns:
+            DataFrame: 工作表数据
+        """
+        wb = load_workbook(self.file_path, read_only=True, data_only=True, keep_links=False)
+        try:
+            if sheet_name not in wb.sheetnames:
+                raise ValueError(f"Worksheet named '{sheet_name}' not found")
+            return self._values_to_frame(wb[sheet_name].iter_rows(values_only=True))
+        finally:
+            wb.close()
+    
+    @staticmethod
+    def _cell_value(value):
+        """
+        单元格的值按 pd.read_excel 的规则转换：空字符串为空值，整数值的小数为整数
+        """
+        if value is None or value == '':
+            return np.nan
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+    
+    @staticmethod
+    def _values_to_frame(rows):
+        """
+        由工作表各行的值生成 DataFrame，结果与 pd.read_excel 一致：
+        第一行为表头，去掉末尾的空行，表头为空的列命名为 "Unnamed: 列号"
+        
+        Args:
+            rows: 各行的值（元组）
+            
+        Returns:
+            DataFrame: 工作表数据
+        """
+        # 去掉每行末尾的空单元格和末尾的空行
+        values = []
+        last = 0
+        for row in rows:
+            row = list(row)
+            while row and (row[-1] is None or row[-1] == ''):
+                row.pop()
+            values.append(row)
+            if row:
+                last = len(values)
+        values = values[:last]
+        if not values:
+            return pd.DataFrame()
+        
+        width = max(len(row) for row in values)
+        header = values[0] + [None] * (width - len(values[0]))
+        columns = [f"Unnamed: {idx}" if name is None or name == '' else ExcelHandler._cell_value(name)
+                   for idx, name in enumerate(header)]
+        body = [[ExcelHandler._cell_value(value) for value in row] + [np.nan] * (width - len(row))
+                for row in values[1:]]
+        return pd.DataFrame(body, columns=columns).infer_objects()
     
-    def read_data_from_sheet(self, sheet_name):
+    def _write_frame(self, data, sheet_name):
+        """
+        在会话的工作簿中写入 DataFrame（替换同名工作表，位置不变）
+        
+        Args:
+            data: 要写入的DataFrame数据
+            sheet_name: 目标工作表名称
+        """
+        wb = self._workbook
+        index = None
+        if sheet_name in wb.sheetnames:
+            index = wb.sheetnames.index(sheet_name)
+            wb.remove(wb[sheet_name])
+        ws = wb.create_sheet(sheet_name, index)
+        
+        ws.append([str(column) for column in data.columns])
+        for cell in ws[1]:
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+        for row in data.astype(object).itertuples(index=False, name=None):
+            # 空值写为空单元格
+            ws.append([None if pd.isna(value) else value for value in row])
+    
+    def _read_frame(self, sheet_name):
+        """
+        从会话的工作簿读取工作表（第一行为表头）
+        
+        Args:
+            sheet_name: 工作表名称
+            
+        Returns:
+            DataFrame: 读取的数据
+        """
+        rows = list(self._workbook[sheet_name].iter_rows(values_only=True))
+        if not rows:
+            return pd.DataFrame()
+        return pd.DataFrame(rows[1:], columns=rows[0]).dropna(how='all')
+    
+    def read_data_from_sheet(self, sheet_name, columns=None):
         """
         从指定工作表读取数据
         
         Args:
             sheet_name: 工作表名称
+            columns: 只读取这些列（如 ['名称', '核心']），None 表示全部列
             
         Returns:
             DataFrame: 读取的数据，失败时返回None
         """
         try:
-            df = pd.read_excel(self.file_path, sheet_name=sheet_name)
+            if self._workbook is not None:
+                # 会话中读取内存中的工作簿（包含会话内尚未保存的写入）
+                df = self._read_frame(sheet_name)
+                if columns is not None:
+                    df = df[list(columns)]
+            else:
+                # 文件未变化时重复读取直接使用缓存
+                df = self._cached_sheet(sheet_name, columns)
             print(f"成功从工作表读取数据: {sheet_name}")
             return df
         except Exception as e:
@@ -53,17 +326,26 @@ class ExcelHandler:
             mode: 写入模式，'w'为覆盖，'a'为追加（默认覆盖）
         """
         try:
-            if mode == 'a':
+            if self._workbook is not None:
+                # 会话中：在内存中写入，覆盖模式时删除其他工作表
+                if mode != 'a':
+                    for name in self._workbook.sheetnames:
+                        if name != sheet_name:
+                            self._workbook.remove(self._workbook[name])
+                self._write_frame(data, sheet_name)
+            elif mode == 'a':
                 # 追加模式
                 with pd.ExcelWriter(self.file_path, mode="a", engine="openpyxl", if_sheet_exists="replace") as writer:
                     data.to_excel(writer, sheet_name=sheet_name, index=False)
+                self._invalidate_cache()
             else:
                 # 覆盖模式（默认）
                 with pd.ExcelWriter(self.file_path, engine="openpyxl") as writer:
                     data.to_excel(writer, sheet_name=sheet_name, index=False)
+                self._invalidate_cache()
             print(f"数据已成功保存到工作表: {sheet_name}")
         except Exception as e:
-            print(f"保存数据到工作表 {sheet_name} 错误: {e}")
+            self._write_failed(f"保存数据到工作表 {sheet_name} 错误: {e}")
 
     def append_data_to_sheet(self, data, target_sheet_name):
         """
@@ -74,17 +356,173 @@ class ExcelHandler:
             target_sheet_name: 目标工作表名称
         """
         try:
-            with pd.ExcelWriter(
-                self.file_path, 
-                mode="a", 
-                engine="openpyxl", 
-                if_sheet_exists="replace"
-            ) as writer:
-                data.to_excel(writer, sheet_name=target_sheet_name, index=False)
+            if self._workbook is not None:
+                self._write_frame(data, target_sheet_name)
+            else:
+                with pd.ExcelWriter(
+                    self.file_path, 
+                    mode="a", 
+                    engine="openpyxl", 
+                    if_sheet_exists="replace"
+                ) as writer:
+                    data.to_excel(writer, sheet_name=target_sheet_name, index=False)
+                self._invalidate_cache()
             print(f"数据成功追加到工作表: {target_sheet_name}")
         except Exception as e:
-            print(f"追加数据到工作表 {target_sheet_name} 错误: {e}")
+            self._write_failed(f"追加数据到工作表 {target_sheet_name} 错误: {e}")
     
+    def save_sheets(self, sheets):
+        """
+        写入多个工作表（已存在的工作表被替换），文件只打开、保存一次
+
+        Args:
+            sheets: {工作表名称: DataFrame}
+        """
+        try:
+            if self._workbook is not None:
+                for sheet_name, data in sheets.items():
+                    self._write_frame(data, sheet_name)
+            else:
+                with pd.ExcelWriter(
+                    self.file_path,
+                    mode="a",
+                    engine="openpyxl",
+                    if_sheet_exists="replace"
+                ) as writer:
+                    for sheet_name, data in sheets.items():
+                        data.to_excel(writer, sheet_name=sheet_name, index=False)
+                self._invalidate_cache()
+            print(f"数据已成功保存到工作表: {', '.join(sheets)}")
+        except Exception as e:
+            self._write_failed(f"保存数据到工作表 {', '.join(sheets)} 错误: {e}")
+
+    def export_sheets(self, sheets, output_path, format_sheets=(), core_stocks=()):
+        """
+        流式导出多个工作表到新文件：使用只写（write-only）工作簿逐行写入，
+        超链接、颜色、核心股票高亮和列宽在写入时一并设置，不再重新打开文件格式化，
+        内存占用与行数无关
+
+        只写工作簿无法保留原文件中的其他工作表，因此导出到单独的文件（已存在时覆盖）
+
+        Args:
+            sheets: {工作表名称: DataFrame}
+            output_path: 导出文件路径
+            format_sheets: 需要格式化的工作表名称（与 format_worksheet 相同的格式）
+            core_stocks: 核心股票名称，在格式化的工作表中设为红色
+
+        Returns:
+            bool: 是否导出成功
+        """
+        try:
+            wb = Workbook(write_only=True)
+            for sheet_name, data in sheets.items():
+                ws = wb.create_sheet(sheet_name)
+                if sheet_name in format_sheets:
+                    self._stream_formatted_frame(ws, data, set(core_stocks))
+                else:
+                    ws.append(self._header_cells(ws, data.columns))
+                    for row in data.astype(object).itertuples(index=False, name=None):
+                        ws.append([None if pd.isna(value) else value for value in row])
+            wb.save(output_path)
+            if os.path.abspath(output_path) == os.path.abspath(self.file_path):
+                self._invalidate_cache()
+            print(f"数据已流式导出到 {output_path}: {', '.join(sheets)}")
+            return True
+        except Exception as e:
+            print(f"流式导出到 {output_path} 错误: {e}")
+            return False
+
+    @staticmethod
+    def _header_cells(ws, columns):
+        """
+        只写工作表的表头单元格（与 _write_frame 相同的表头样式）
+
+        Args:
+            ws: 只写工作表
+            columns: 列名
+
+        Returns:
+            list: 表头单元格
+        """
+        cells = []
+        for column in columns:
+            cell = WriteOnlyCell(ws, str(column))
+            cell.font = HEADER_FONT
+            cell.border = HEADER_BORDER
+            cell.alignment = HEADER_ALIGNMENT
+            cells.append(cell)
+        return cells
+
+    def _stream_formatted_frame(self, ws, data, core_stocks):
+        """
+        逐行写入并格式化只写工作表
+
+        Args:
+            ws: 只写工作表
+            data: 要写入的DataFrame数据
+            core_stocks: 核心股票名称集合
+        """
+        header = [str(column) for column in data.columns]
+        code_col_index = self._header_index(header, '代码', 0)
+        name_col_index = self._header_index(header, '名称', 1)
+        skip_col_index = column_index_from_string(COLOR_SKIP_COLUMN) - 1
+
+        # 列宽和条件格式需在写入第一行之前设置
+        for col_letter, width in COLUMN_WIDTHS.items():
+            ws.column_dimensions[col_letter].width = width
+        if COLOR_RANGES is not None:
+            self._add_conditional_formats(ws, COLOR_RANGES, len(data) + 1, len(header))
+
+        ws.append(self._header_cells(ws, header))
+        # 每种颜色的单元格样式只生成一次
+        fill_styles = {}
+        for row in data.astype(object).itertuples(index=False, name=None):
+            # 空值写为空单元格
+            cells = [None if pd.isna(value) else value for value in row]
+
+            if COLOR_RANGES is None:
+                for idx, value in enumerate(cells):
+                    if idx == skip_col_index or not isinstance(value, (int, float)):
+                        continue
+                    # 根据数值范围设置颜色
+                    for rule_index, (condition, color) in enumerate(COLOR_RULES):
+                        if condition(value):
+                            cells[idx] = self._filled_cell(ws, value, rule_index, color, fill_styles)
+                            break
+
+            # 名称列：超链接和核心股票高亮（名称为文本，不会被着色）
+            name = cells[name_col_index]
+            hyperlink = self._stock_page_url(cells[code_col_index])
+            if hyperlink or name in core_stocks:
+                name_cell = WriteOnlyCell(ws, name)
+                if hyperlink:
+                    name_cell.hyperlink = hyperlink
+                    name_cell.style = "Hyperlink"
+                if name in core_stocks:
+                    name_cell.font = CORE_STOCK_FONT
+                cells[name_col_index] = name_cell
+            ws.append(cells)
+
+    @staticmethod
+    def _filled_cell(ws, value, rule_index, color, fill_styles):
+        """
+        生成带颜色的只写单元格，同一颜色复用已生成的样式（逐个设置填充需要反复计算样式，数据多时很慢）
+
+        Args:
+            ws: 只写工作表
+            value: 单元格的值
+            rule_index: 匹配的颜色规则序号
+            color: 颜色规则的填充
+            fill_styles: {颜色规则序号: 样式}，同一工作表共用
+        """
+        cell = WriteOnlyCell(ws, value)
+        if rule_index in fill_styles:
+            cell._style = copy(fill_styles[rule_index])
+        else:
+            cell.fill = color
+            fill_styles[rule_index] = copy(cell._style)
+        return cell
+
     def apply_color_coding(self, sheet_name):
         """
         为工作表应用颜色编码
@@ -93,9 +531,15 @@ class ExcelHandler:
             sheet_name: 工作表名称
         """
         try:
-            wb = load_workbook(self.file_path)
+            wb = self._load_workbook()
             ws = wb[sheet_name]
             
+            if COLOR_RANGES is not None:
+                self._add_conditional_formats(ws, COLOR_RANGES, ws.max_row, ws.max_column)
+                self._save_workbook(wb)
+                print(f"颜色编码（条件格式）已应用到工作表: {sheet_name}")
+                return
+            
             for row in ws.iter_rows():
                 for cell in row:
                     # 如果是I列则跳过
@@ -110,11 +554,89 @@ class ExcelHandler:
                                 cell.fill = color
                                 break
             
-            wb.save(self.file_path)
+            self._save_workbook(wb)
             print(f"颜色编码已应用到工作表: {sheet_name}")
             
         except Exception as e:
-            print(f"应用颜色编码错误: {e}")
+            self._format_failed(f"应用颜色编码错误: {e}")
+    
+    @staticmethod
+    def _color_areas(max_column):
+        """
+        颜色编码的单元格区域（跳过收盘价列）
+        
+        Args:
+            max_column: 工作表的列数
+            
+        Returns:
+            list: [(起始列号, 结束列号)]
+        """
+        skip = column_index_from_string(COLOR_SKIP_COLUMN)
+        areas = []
+        if max_column >= 1:
+            areas.append((1, min(skip - 1, max_column)))
+        if max_column > skip:
+            areas.append((skip + 1, max_column))
+        return [(first, last) for first, last in areas if first <= last]
+    
+    @staticmethod
+    def _color_formula(ref, operator, value):
+        """
+        条件格式公式：只对数字单元格生效（与逐个单元格着色时只处理数字一致）
+        """
+        if operator == 'between':
+            low, high = value
+            return f"AND(ISNUMBER({ref}),{ref}>={low},{ref}<={high})"
+        return f"AND(ISNUMBER({ref}),{ref}{operator}{value})"
+    
+    def _add_conditional_formats(self, ws, color_ranges, max_row, max_column):
+        """
+        用 Excel 条件格式实现颜色编码：每条规则每个区域一个条件格式，与单元格数量无关
+        
+        Args:
+            ws: 工作表
+            color_ranges: [(比较符, 阈值, PatternFill)]
+            max_row: 着色的最后一行
+            max_column: 着色的最后一列
+        """
+        # 重新着色时替换原有的条件格式
+        ws.conditional_formatting = ConditionalFormattingList()
+        
+        for first, last in self._color_areas(max_column):
+            ref = f"{get_column_letter(first)}1"
+            sqref = f"{ref}:{get_column_letter(last)}{max_row}"
+            for operator, value, fill in color_ranges:
+                color = fill.fgColor.rgb
+                # 条件格式的纯色填充使用背景色，前景色、背景色都设为同一颜色
+                style = DifferentialStyle(fill=PatternFill(fill_type='solid', start_color=color, end_color=color))
+                rule = Rule(type='expression', dxf=style, stopIfTrue=True,
+                            formula=[self._color_formula(ref, operator, value)])
+                ws.conditional_formatting.add(sqref, rule)
+    
+    @staticmethod
+    def _stock_page_url(stock_code):
+        """
+        股票详情页链接
+        
+        Args:
+            stock_code: 股票代码，如 "300229.SZ"、"A.300229"
+            
+        Returns:
+            str: 链接，代码中没有数字部分时返回 None
+        """
+        if stock_code is None or pd.isna(stock_code):
+            return None
+        for part in str(stock_code).split('.'):
+            if part.isdigit():
+                return STOCK_PAGE_URL.format(code=part)
+        return None
+    
+    @staticmethod
+    def _header_index(header, column_name, default):
+        """
+        按表头查找列的位置，找不到时使用默认位置
+        """
+        return header.index(column_name) if column_name in header else default
     
     def add_hyperlinks(self, sheet_name):
         """
@@ -124,28 +646,27 @@ class ExcelHandler:
             sheet_name: 工作表名称
         """
         try:
-            wb = load_workbook(self.file_path)
+            wb = self._load_workbook()
             ws = wb[sheet_name]
             
-            # 遍历所有行（从第二行开始，假设第一行是表头）
+            # 按表头查找代码列和名称列（没有表头时假设代码在第一列、名称在第二列）
+            header = [cell.value for cell in next(ws.iter_rows(max_row=1))]
+            code_col_index = self._header_index(header, '代码', 0)
+            name_col_index = self._header_index(header, '名称', 1)
+            
+            # 遍历所有行（从第二行开始，第一行是表头）
             for row in ws.iter_rows(min_row=2, max_col=ws.max_column, max_row=ws.max_row):
-                stock_code_cell = row[0]  # 假设股票代码在第一列
-                stock_name_cell = row[1]  # 假设股票名称在第二列
-                
-                if stock_code_cell.value:
-                    stock_code = str(stock_code_cell.value).split('.')[1]
-                    
-                    # 创建超链接
-                    hyperlink = f"https://stockpage.10jqka.com.cn/{stock_code}/"
+                hyperlink = self._stock_page_url(row[code_col_index].value)
+                if hyperlink:
+                    stock_name_cell = row[name_col_index]
                     stock_name_cell.hyperlink = hyperlink
-                    stock_name_cell.font = Font(color="0000FF", underline="single")  # 蓝色字体，带下划线
-                    stock_name_cell.style = "Hyperlink"  # 应用超链接样式
+                    stock_name_cell.style = "Hyperlink"  # 应用超链接样式（蓝色字体，带下划线）
             
-            wb.save(self.file_path)
+            self._save_workbook(wb)
             print(f"超链接已添加到{sheet_name} 工作表")
             
         except Exception as e:
-            print(f"添加超链接错误: {e}")
+            self._format_failed(f"添加超链接错误: {e}")
     
     def set_column_widths(self, sheet_name):
         """
@@ -155,7 +676,7 @@ class ExcelHandler:
             sheet_name: 工作表名称
         """
         try:
-            wb = load_workbook(self.file_path)
+            wb = self._load_workbook()
             ws = wb[sheet_name]
             
             # 确保所有列维度都存在
@@ -168,11 +689,11 @@ class ExcelHandler:
                 ws.column_dimensions[col_letter].width = width
                 print(f"设置列 {col_letter} 宽度为 {width}")
             
-            wb.save(self.file_path)
+            self._save_workbook(wb)
             print(f"列宽已按照固定顺序设置到{sheet_name} 工作表")
             
         except Exception as e:
-            print(f"设置列宽错误: {e}")
+            self._format_failed(f"设置列宽错误: {e}")
     
     def get_column_widths(self, sheet_name):
         """
@@ -185,7 +706,7 @@ class ExcelHandler:
             dict: 列名和列宽的映射
         """
         try:
-            wb = load_workbook(self.file_path)
+            wb = self._load_workbook()
             ws = wb[sheet_name]
             
             column_widths = {}
@@ -227,8 +748,9 @@ class ExcelHandler:
             list: 过滤后的数据列表
         """
         try:
-            # skiprows=1 跳过第一行
-            df = pd.read_excel(self.file_path, header=None, skiprows=1, sheet_name=sheet_name)
+            # 跳过第一行（表头），按列号访问
+            df = self._cached_sheet(sheet_name)
+            df.columns = range(df.shape[1])
             
             if filter_conditions:
                 filtered_df = df[filter_conditions(df)]
@@ -253,28 +775,12 @@ class ExcelHandler:
             target_sheet_name: 目标工作表名称（watch工作表）
         """
         try:
-            # 读取源工作表数据
-            source_df = self.read_data_from_sheet(source_sheet_name)
-            if source_df is None:
-                print(f"无法读取源工作表: {source_sheet_name}")
-                return
-            
-            # 检查是否有核心列
-            if '核心' not in source_df.columns:
-                print(f"源工作表 {source_sheet_name} 中未找到'核心'列")
-                return
-            
-            # 获取核心列等于1的股票名称
-            core_stocks = source_df[source_df['核心'] == 1]['名称'].tolist()
-            
+            core_stocks = self.read_core_stocks(source_sheet_name)
             if not core_stocks:
-                print(f"源工作表 {source_sheet_name} 中没有核心列等于1的股票")
                 return
             
-            print(f"找到核心股票: {core_stocks}")
-            
             # 打开Excel文件
-            wb = load_workbook(self.file_path)
+            wb = self._load_workbook()
             ws = wb[target_sheet_name]
             
             # 获取名称列的索引
@@ -287,22 +793,49 @@ class ExcelHandler:
             
             if name_col_index is None:
                 print(f"目标工作表 {target_sheet_name} 中未找到'名称'列")
-                wb.close()
+                self._close_workbook(wb)
                 return
             
             # 遍历目标工作表的名称列，将核心股票设为红色
-            red_font = Font(color="FF0000", bold=True)  # 红色加粗字体
-            
             for row in ws.iter_rows(min_row=2, max_row=ws.max_row):
                 name_cell = row[name_col_index]
                 if name_cell.value in core_stocks:
-                    name_cell.font = red_font
+                    name_cell.font = CORE_STOCK_FONT
                     print(f"已将股票 {name_cell.value} 设为红色")
             
             # 保存文件
-            wb.save(self.file_path)
-            wb.close()
+            self._save_workbook(wb)
+            self._close_workbook(wb)
             print(f"核心股票高亮完成，共处理 {len(core_stocks)} 只股票")
             
         except Exception as e:
-            print(f"高亮核心股票错误: {e}")
\ No newline at end of file
+            self._format_failed(f"高亮核心股票错误: {e}")
+
+    def read_core_stocks(self, source_sheet_name):
+        """
+        读取源工作表中核心列等于1的股票名称
+        
+        Args:
+            source_sheet_name: 源工作表名称（包含核心列）
+            
+        Returns:
+            list: 核心股票名称，读取失败或没有核心股票时为空列表
+        """
+        source_df = self.read_data_from_sheet(source_sheet_name)
+        if source_df is None:
+            print(f"无法读取源工作表: {source_sheet_name}")
+            return []
+        
+        # 检查是否有核心列
+        if '核心' not in source_df.columns:
+            print(f"源工作表 {source_sheet_name} 中未找到'核心'列")
+            return []
+        
+        # 获取核心列等于1的股票名称
+        core_stocks = source_df[source_df['核心'] == 1]['名称'].tolist()
+        if not core_stocks:
+            print(f"源工作表 {source_sheet_name} 中没有核心列等于1的股票")
+            return []
+        
+        print(f"找到核心股票: {core_stocks}")
+        return core_stocks
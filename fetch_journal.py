@@ -0,0 +1,124 @@
+"""
+下载日志模块
+逐只记录已完成下载的股票，程序中断后重新运行可从断点继续
+"""
+
+import os
+import json
+
+# 默认日志文件（相对当前工作目录）
+JOURNAL_FILE = 'fetch_journal.jsonl'
+
+
+class FetchJournal:
+    """
+    下载断点日志（JSON Lines 格式）
+    第一行记录本次下载的标识，之后每行记录一只股票的完成或失败信息
+    """
+
+    def __init__(self, run_key, journal_path=JOURNAL_FILE):
+        """
+        初始化下载日志，标识相同的未完成日志会被恢复，否则重新开始
+
+        Args:
+            run_key: 本次下载的标识（如 最新交易日+下载模式）
+            journal_path: 日志文件路径
+        """
+        self.run_key = run_key
+        self.journal_path = journal_path
+        self.completed = {}
+        self.failed = {}
+        self._load()
+
+    def _load(self):
+        """
+        读取未完成的日志
+        """
+        if not os.path.exists(self.journal_path):
+            self._write({"run": self.run_key}, mode='w')
+            return
+
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # 中断时最后一行可能未写完整
+                break
+
+        if not records or records[0].get("run") != self.run_key:
+            self._write({"run": self.run_key}, mode='w')
+            return
+
+        for record in records[1:]:
+            if "done" in record:
+                self.completed[record["done"]] = record.get("entry")
+                self.failed.pop(record["done"], None)
+            elif "failed" in record:
+                self.failed[record["failed"]] = record.get("error")
+        print(f"恢复下载进度：已完成 {len(self.completed)} 只股票")
+
+    def _write(self, record, mode='a'):
+        """
+        写入一条日志并立即落盘
+        """
+        with open(self.journal_path, mode, encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark_done(self, stock_name, entry=None):
+        """
+        记录股票下载完成
+
+        Args:
+            stock_name: 股票名称
+            entry: 数据存储中的索引信息，用于恢复
+        """
+        self.completed[stock_name] = entry
+        self.failed.pop(stock_name, None)
+        self._write({"done": stock_name, "entry": entry})
+
+    def mark_failed(self, stock_name, error):
+        """
+        记录股票下载失败
+
+        Args:
+            stock_name: 股票名称
+            error: 错误信息
+        """
+        self.failed[stock_name] = str(error)
+        self._write({"failed": stock_name, "error": str(error)})
+
+    def is_done(self, stock_name):
+        """
+        判断股票是否已完成下载
+
+        Args:
+            stock_name: 股票名称
+
+        Returns:
+            bool: 是否已完成
+        """
+        return stock_name in self.completed
+
+    def finish(self):
+        """
+        结束本次下载：输出失败汇总并删除日志
+
+        Returns:
+            dict: 失败的股票 {股票名称: 错误信息}
+        """
+        if self.failed:
+            print(f"下载完成，成功 {len(self.completed)} 只，失败 {len(self.failed)} 只：")
+            for stock_name, error in self.failed.items():
+                print(f"  {stock_name}: {error}")
+        else:
+            print(f"下载完成，成功 {len(self.completed)} 只，无失败")
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        return dict(self.failed)
@@ -0,0 +1,93 @@
+"""
+指标缓存模块
+按 (股票, 指标, 参数, 数据版本) 缓存滚动指标的计算结果，进程内所有调用方共用：
+批量计算的指标面板、add_boll、check_ma_converge、analyze_stock_status 单独调用时的单只股票面板，
+同一只股票同一组数据的同一指标只计算一次；按最近最少使用淘汰，适合长时间运行的进程
+"""
+
+import threading
+from collections import OrderedDict
+
+# 默认最多缓存的指标数（每只股票每个指标一条）
+CACHE_MAXSIZE = 4096
+
+
+class IndicatorCache:
+    """LRU 指标缓存（线程安全）"""
+
+    def __init__(self, maxsize=CACHE_MAXSIZE):
+        """
+        Args:
+            maxsize: 最多缓存的条目数
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的值，不存在时返回 None
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """
+        写入缓存，超过容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 缓存的值
+        """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+
+# 进程内共享的缓存
+shared_cache = IndicatorCache()
+
+
+def data_version(df, columns=()):
+    """
+    数据版本：行数、首尾两行的交易日期（按现有行顺序）和最后一行的行情值，O(1)
+    数据存储只通过增删交易日改变一只股票的数据，盘中运行时最新一根K线的值还会变化，
+    两种情况下版本都随之改变；同一数据按不同顺序排列（升序/降序）时版本也不同
+
+    Args:
+        df: 行情数据
+        columns: 参与计算的行情列
+
+    Returns:
+        tuple: 数据版本，没有 trade_date 列时返回 None（不使用缓存）
+    """
+    if 'trade_date' not in df.columns or not len(df):
+        return None
+    dates = df['trade_date']
+    last_values = tuple(float(df[column].iloc[-1]) for column in columns)
+    return len(df), str(dates.iloc[0]), str(dates.iloc[-1]), last_values
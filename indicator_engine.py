@@ -0,0 +1,221 @@
+"""
+面板指标计算模块
+把全部股票的行情组成 K线序号 × 股票 的二维数组，一次性计算所有股票的均线、BOLL、%B、阶段高点和斜率
+各股票按最近一根K线右对齐（停牌日不补空值），结果与逐只股票调用 pandas rolling 完全一致
+一次运行中同一组行情只建一个面板，同一指标（相同参数）只计算一次；
+add_boll、check_ma_converge、analyze_stock_status 直接读取面板算好的列，单独调用时也通过单只股票的面板计算；
+各股票的计算结果写入共享的指标缓存（indicator_cache），不同面板之间按 (股票, 指标, 参数, 数据版本) 复用
+"""
+
+import numpy as np
+import pandas as pd
+from indicator_cache import shared_cache, data_version
+
+
+class IndicatorPanel:
+    """全部股票的指标面板"""
+
+    def __init__(self, frames, columns=('close',), cache=shared_cache):
+        """
+        初始化指标面板
+
+        Args:
+            frames: {股票名称: DataFrame}，按各自现有的行顺序排列（最后一行为计算基准）
+            columns: 需要放入面板的行情列
+            cache: 共享的指标缓存，None 表示不使用
+        """
+        self.symbols = list(frames.keys())
+        self._positions = {symbol: j for j, symbol in enumerate(self.symbols)}
+        self.lengths = np.array([len(df) for df in frames.values()], dtype=int)
+        self.rows = int(self.lengths.max()) if len(self.lengths) else 0
+        self.columns = {}
+        self._cache = {}
+        self.shared_cache = cache
+        self._cache_keys = [self._cache_key(symbol, df, columns) for symbol, df in frames.items()]
+
+        for column in columns:
+            values = np.full((self.rows, len(self.symbols)), np.nan)
+            for j, df in enumerate(frames.values()):
+                if len(df):
+                    values[self.rows - len(df):, j] = df[column].to_numpy(dtype=float)
+            self.columns[column] = values
+
+    @staticmethod
+    def _cache_key(symbol, df, columns):
+        """
+        股票在共享缓存中的 (股票, 数据版本)：有 ts_code 列时以代码为股票标识，
+        无法确定股票或数据版本时返回 None（该股票不使用共享缓存）
+        """
+        if 'ts_code' in df.columns and len(df):
+            symbol = str(df['ts_code'].iloc[0])
+        if symbol is None:
+            return None
+        version = data_version(df, columns)
+        return None if version is None else (symbol, version)
+
+    @classmethod
+    def single(cls, df, columns=('close',)):
+        """
+        单只股票的面板（逐只股票调用时使用，计算方式与批量计算相同）
+
+        Args:
+            df: 行情数据，按现有的行顺序计算
+            columns: 需要放入面板的行情列
+
+        Returns:
+            IndicatorPanel: 只有一只股票的面板，用 column(数组) 取出该股票的指标
+        """
+        return cls({None: df}, columns)
+
+    def column(self, values, symbol=None):
+        """
+        取出单只股票的指标序列（与该股票的行一一对应）
+
+        Args:
+            values: K线序号 × 股票 的数组
+            symbol: 股票名称，单只股票的面板为 None
+
+        Returns:
+            ndarray: 该股票的指标序列
+        """
+        j = self._positions[symbol]
+        return values[self.rows - self.lengths[j]:, j]
+
+    def _rolling(self, column, window, min_periods, how):
+        """
+        对面板的所有股票做一次滚动计算（带缓存）：全部股票都已在共享缓存中时直接组装，
+        否则一次计算全部股票并把各股票的结果写入共享缓存
+        """
+        key = (column, window, min_periods, how)
+        if key not in self._cache:
+            result = self._from_shared(key)
+            if result is None:
+                result = self._compute(key)
+                self._to_shared(key, result)
+            self._cache[key] = result
+        return self._cache[key]
+
+    def _from_shared(self, key):
+        """
+        从共享缓存组装 K线序号 × 股票 的结果，有股票未缓存时返回 None
+        """
+        if self.shared_cache is None or not self.symbols:
+            return None
+        result = np.full((self.rows, len(self.symbols)), np.nan)
+        for j, cache_key in enumerate(self._cache_keys):
+            values = None if cache_key is None else self.shared_cache.get(cache_key + key)
+            if values is None:
+                return None
+            result[self.rows - self.lengths[j]:, j] = values
+        return result
+
+    def _to_shared(self, key, result):
+        """
+        把各股票的计算结果写入共享缓存（只读副本）
+        """
+        if self.shared_cache is None:
+            return
+        for j, cache_key in enumerate(self._cache_keys):
+            if cache_key is not None:
+                values = result[self.rows - self.lengths[j]:, j].copy()
+                values.setflags(write=False)
+                self.shared_cache.put(cache_key + key, values)
+
+    def _compute(self, key):
+        """
+        对面板的所有股票做一次滚动计算
+        """
+        column, window, min_periods, how = key
+        rolling = pd.DataFrame(self.columns[column]).rolling(window, min_periods=min_periods)
+        if how == 'mean':
+            result = rolling.mean()
+        elif how == 'std':
+            result = rolling.std(ddof=0)
+        elif how == 'max':
+            result = rolling.max()
+        elif how == 'min':
+            result = rolling.min()
+        else:
+            raise ValueError(f"不支持的滚动计算: {how}")
+        return result.to_numpy()
+
+    def ma(self, window, column='close', min_periods=None):
+        """
+        移动平均
+
+        Args:
+            window: 窗口长度
+            column: 行情列
+            min_periods: 最少数据个数，默认为窗口长度
+
+        Returns:
+            ndarray: K线序号 × 股票
+        """
+        return self._rolling(column, window, window if min_periods is None else min_periods, 'mean')
+
+    def std(self, window, column='close', min_periods=None):
+        """
+        滚动标准差（总体标准差，ddof=0）
+        """
+        return self._rolling(column, window, window if min_periods is None else min_periods, 'std')
+
+    def rolling_max(self, window, column='close', min_periods=1):
+        """
+        滚动最高值（默认允许窗口不足，用于阶段新高）
+        """
+        return self._rolling(column, window, min_periods, 'max')
+
+    def rolling_min(self, window, column='close', min_periods=1):
+        """
+        滚动最低值
+        """
+        return self._rolling(column, window, min_periods, 'min')
+
+    def boll(self, win=20, k=2.0):
+        """
+        BOLL 指标，与 support_buy_scanner.add_boll 相同
+
+        Returns:
+            dict: {"MA20", "STD20", "UPPER", "LOWER", "percentB"}，每项为 K线序号 × 股票
+        """
+        ma = self.ma(win)
+        std = self.std(win)
+        upper = ma + k * std
+        lower = ma - k * std
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_b = (self.columns['close'] - lower) / (upper - lower)
+        return {"MA20": ma, "STD20": std, "UPPER": upper, "LOWER": lower, "percentB": percent_b}
+
+    def slope(self, values, lag):
+        """
+        相对 lag 根K线之前的变化率 (v - v_lag) / v_lag
+
+        Args:
+            values: K线序号 × 股票 的数组
+            lag: 间隔K线数
+
+        Returns:
+            ndarray: K线序号 × 股票
+        """
+        result = np.full_like(values, np.nan)
+        previous = values[:-lag]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[lag:] = np.where(previous != 0, (values[lag:] - previous) / previous, 0.0)
+        return result
+
+    def frame(self, symbol, base_df, **arrays):
+        """
+        取出单只股票的指标，附加到该股票的行情数据上
+
+        Args:
+            symbol: 股票名称
+            base_df: 该股票构建面板时使用的 DataFrame
+            **arrays: {列名: K线序号 × 股票 的数组}
+
+        Returns:
+            DataFrame: 附加了指标列的行情数据
+        """
+        df = base_df.copy()
+        for name, values in arrays.items():
+            df[name] = self.column(values, symbol)
+        return df
@@ -0,0 +1,265 @@
+"""
+参数扫描模块
+在股票池全部历史上评估一组参数网格（BOLL 窗口/倍数/接近容差、均线粘合阈值、得分常数），
+按持有 N 天的平均收益对每个信号的参数组合排名；
+得分参数组的最优组合可以保存到 score_params.json（--apply），analyze_stock_status 和回测随后使用
+
+三类参数互不影响，分别组成网格：每个参数组合是进程池中的一个任务；
+全部股票的价格只加载一次，放在共享内存中，工作进程启动时挂载，任务之间不再传递价格数据
+"""
+
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from stock_store import StockDataStore
+from pattern_scanner import scan_boll_touch
+from backtest import score_history, score_status, converge_history, forward_returns, CONVERGE_SIGNAL
+from score_params import SCORE_LEVELS, LOWEST_LEVEL, DEFAULT_SCORE_PARAMS, SCORE_PARAMS_FILE, save_score_params
+
+# 默认工作进程数
+SWEEP_WORKERS = os.cpu_count() or 1
+
+# 默认评估的持有天数和排名所需的最少信号次数
+SWEEP_HORIZON = 10
+MIN_SIGNALS = 30
+
+# 参数网格：{参数组: {参数名: 候选值}}
+SWEEP_GRID = {
+    'boll': {
+        'win': (15, 20, 25),
+        'k': (1.5, 2.0, 2.5),
+        'tol': (0.005, 0.008, 0.01, 0.015),
+    },
+    'converge': {
+        'threshold': (0.005, 0.01, 0.015, 0.02),
+    },
+    'score': {
+        'perfect_high_tol': (0.003, 0.005, 0.01),
+        'near_high_ratio': (0.9, 0.95, 0.97),
+        'ma_entangle': (0.005, 0.01, 0.02),
+        'arc_low_diff': (0.02, 0.03, 0.05),
+    },
+}
+
+RESULT_COLUMNS = ['参数组', 'signal', '参数', '次数', '胜率', '平均收益', '平均回撤', '排名']
+
+# 选择得分参数时依据的信号（最强的得分状态）
+SCORE_TARGET_SIGNAL = SCORE_LEVELS[0][1]
+
+# 工作进程中挂载的共享价格数据
+_shared = {}
+
+
+def _attach(shm_name, total, offsets, horizon):
+    """
+    工作进程初始化：挂载共享内存中的收盘价/最低价
+
+    Args:
+        shm_name: 共享内存名称
+        total: 全部股票的K线总数
+        offsets: 各股票在数组中的起止位置
+        horizon: 持有天数
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    prices = np.ndarray((2, total), dtype=float, buffer=shm.buf)
+    _shared.update(shm=shm, closes=prices[0], lows=prices[1], offsets=offsets, horizon=horizon, forward={})
+
+
+def _forward(j, closes):
+    """第 j 只股票的远期收益/回撤（每个工作进程只算一次）"""
+    if j not in _shared['forward']:
+        _shared['forward'][j] = forward_returns(closes, _shared['horizon'])
+    return _shared['forward'][j]
+
+
+def _signal_masks(group, params, closes, lows):
+    """
+    单只股票在一组参数下的信号
+
+    Returns:
+        dict: {信号名称: 布尔数组}
+    """
+    if group == 'boll':
+        return scan_boll_touch(pd.DataFrame({'close': closes, 'low': lows}), **params)
+    if group == 'converge':
+        return {CONVERGE_SIGNAL: converge_history(closes, **params)}
+    status = score_status(score_history(closes, **params))
+    return {label: status == label for _, label in SCORE_LEVELS + ((None, LOWEST_LEVEL),)}
+
+
+def _evaluate(task):
+    """
+    在工作进程中评估一个参数组合
+
+    Args:
+        task: (参数组, 参数字典)
+
+    Returns:
+        list: 每个信号一行统计结果
+    """
+    group, params = task
+    closes_all, lows_all, offsets = _shared['closes'], _shared['lows'], _shared['offsets']
+    returns, drawdowns = {}, {}
+
+    for j in range(len(offsets) - 1):
+        closes = closes_all[offsets[j]:offsets[j + 1]]
+        lows = lows_all[offsets[j]:offsets[j + 1]]
+        try:
+            masks = _signal_masks(group, params, closes, lows)
+        except Exception as e:
+            print(f"评估第 {j} 只股票时出错: {e}")
+            continue
+        forward_return, forward_drawdown = _forward(j, closes)
+        valid = ~np.isnan(forward_return)
+        for name, mask in masks.items():
+            hit = mask & valid
+            returns.setdefault(name, []).append(forward_return[hit])
+            drawdowns.setdefault(name, []).append(forward_drawdown[hit])
+
+    rows = []
+    label = ", ".join(f"{key}={value}" for key, value in params.items())
+    for name in returns:
+        signal_returns = np.concatenate(returns[name])
+        signal_drawdowns = np.concatenate(drawdowns[name])
+        count = len(signal_returns)
+        rows.append({
+            '参数组': group,
+            'signal': name,
+            '参数': label,
+            '次数': count,
+            '胜率': (signal_returns > 0).mean() if count else np.nan,
+            '平均收益': signal_returns.mean() if count else np.nan,
+            '平均回撤': signal_drawdowns.mean() if count else np.nan,
+        })
+    return rows
+
+
+def grid_tasks(grid=SWEEP_GRID):
+    """
+    展开参数网格
+
+    Args:
+        grid: {参数组: {参数名: 候选值}}
+
+    Returns:
+        list: [(参数组, 参数字典)]
+    """
+    tasks = []
+    for group, space in grid.items():
+        names = list(space.keys())
+        for values in itertools.product(*(space[name] for name in names)):
+            tasks.append((group, dict(zip(names, values))))
+    return tasks
+
+
+def rank_results(rows, min_signals=MIN_SIGNALS):
+    """
+    同一参数组、同一信号内按平均收益排名（信号次数不足的组合不参与排名）
+
+    Args:
+        rows: 评估结果
+        min_signals: 参与排名的最少信号次数
+
+    Returns:
+        DataFrame: 排名结果
+    """
+    result = pd.DataFrame(rows, columns=RESULT_COLUMNS[:-1])
+    if result.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    eligible = result['平均收益'].where(result['次数'] >= min_signals)
+    result['排名'] = eligible.groupby([result['参数组'], result['signal']], sort=False).rank(
+        ascending=False, method='min')
+    result['_order'] = pd.factorize(result['参数组'] + '/' + result['signal'])[0]
+    result = result.sort_values(['_order', '排名'], kind='stable', na_position='last')
+    return result[RESULT_COLUMNS].reset_index(drop=True)
+
+
+def best_score_params(result, signal=SCORE_TARGET_SIGNAL):
+    """
+    得分参数组中指定信号排名第一的参数组合
+
+    Args:
+        result: run_sweep 的排名结果
+        signal: 依据的信号（得分状态）
+
+    Returns:
+        dict: 得分参数，没有参与排名的组合时返回 None
+    """
+    best = result[(result['参数组'] == 'score') & (result['signal'] == signal) & (result['排名'] == 1)]
+    if best.empty:
+        return None
+    params = dict(item.split('=', 1) for item in best['参数'].iloc[0].split(', '))
+    return {name: float(value) for name, value in params.items() if name in DEFAULT_SCORE_PARAMS}
+
+
+def run_sweep(data_store=None, grid=SWEEP_GRID, horizon=SWEEP_HORIZON, workers=SWEEP_WORKERS,
+              min_signals=MIN_SIGNALS):
+    """
+    在全部已保存股票的历史上扫描参数网格
+
+    Args:
+        data_store: 股票数据存储，默认为 stocks_data 目录
+        grid: 参数网格
+        horizon: 持有天数
+        workers: 工作进程数
+        min_signals: 参与排名的最少信号次数
+
+    Returns:
+        DataFrame: 排名结果
+    """
+    data_store = data_store if data_store is not None else StockDataStore()
+
+    # 全部股票的价格按升序拼接成一个数组，放入共享内存
+    closes, lows = [], []
+    for _, _, history_df in data_store.iter_histories(columns=['trade_date', 'close', 'low']):
+        history_df = history_df.sort_values('trade_date')
+        closes.append(history_df['close'].to_numpy(dtype=float))
+        lows.append(history_df['low'].to_numpy(dtype=float))
+    offsets = np.concatenate(([0], np.cumsum([len(c) for c in closes]))).astype(np.int64)
+    total = int(offsets[-1])
+
+    tasks = grid_tasks(grid)
+    print(f"参数扫描：{len(closes)} 只股票，{len(tasks)} 个参数组合，{workers} 个进程")
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, 2 * total * 8))
+    try:
+        prices = np.ndarray((2, total), dtype=float, buffer=shm.buf)
+        if total:
+            prices[0] = np.concatenate(closes)
+            prices[1] = np.concatenate(lows)
+
+        rows = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach,
+                                 initargs=(shm.name, total, offsets, horizon)) as executor:
+            for task_rows in executor.map(_evaluate, tasks):
+                rows.extend(task_rows)
+        del prices
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return rank_results(rows, min_signals)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS, help="工作进程数")
+    parser.add_argument("--apply", action="store_true",
+                        help=f"把 {SCORE_TARGET_SIGNAL} 排名第一的得分参数保存到 {SCORE_PARAMS_FILE}，供每日评分使用")
+    args = parser.parse_args()
+
+    result = run_sweep(workers=args.workers)
+    result.to_csv('parameter_sweep.csv', index=False, encoding='utf-8-sig')
+    print(result[result['排名'] == 1].to_string(index=False))
+    print("参数扫描结果已保存到 parameter_sweep.csv")
+    if args.apply:
+        params = best_score_params(result)
+        if params is None:
+            print(f"{SCORE_TARGET_SIGNAL} 没有信号次数足够的得分参数组合，未保存")
+        else:
+            save_score_params(params)
+            print(f"得分参数已保存到 {SCORE_PARAMS_FILE}: {params}")
@@ -0,0 +1,181 @@
+"""
+历史形态扫描模块
+在每只股票历史的每一个交易日上判断 V型底 / W型底 / 圆弧底 和 BOLL 接近信号，
+输出 (股票, 日期, 信号) 信号表，用于统计信号在全部历史中出现的频率和时间
+
+判断规则与 analyze_stock_status 的底部形态评分、boll_touch_signal 相同，
+但整段历史一次性用数组和区间极值查询完成，不逐日调用单日判断函数
+"""
+
+import numpy as np
+import pandas as pd
+from stock_store import StockDataStore
+from range_extrema import RangeExtrema
+from support_buy_scanner import add_boll, BOLL_WIN, BOLL_K, TOL
+# 底部形态参数（与 analyze_stock_status 共用）
+from score_params import (RECENT_DAYS, V_REBOUND_DAYS, V_REBOUND_PCT, W_LOW_DIFF,
+                          ARC_WINDOW, ARC_LOW_DIFF, ARC_MIN_SPAN)
+
+# 信号表列名
+SIGNAL_COLUMNS = ['股票名', 'trade_date', 'signal']
+
+BOTTOM_SIGNALS = ('V型底', 'W型底', '圆弧底')
+BOLL_SIGNALS = ('收盘价接近中轨', '收盘价接近下轨', '下引线接近中轨', '下引线接近下轨')
+
+
+def scan_bottom_patterns(closes, arc_low_diff=ARC_LOW_DIFF):
+    """
+    在每个交易日上判断底部形态（以该日为最后一天的最近60个交易日）
+
+    Args:
+        closes: 收盘价（按时间升序）
+        arc_low_diff: 圆弧底相邻低点差值上限
+
+    Returns:
+        dict: {"V型底" / "W型底" / "圆弧底": 与 closes 等长的布尔数组}，不足60天的日期为 False
+    """
+    closes = np.asarray(closes, dtype=float)
+    n = len(closes)
+    result = {name: np.zeros(n, dtype=bool) for name in BOTTOM_SIGNALS}
+    if n < RECENT_DAYS:
+        return result
+
+    extrema = RangeExtrema(closes)
+    ends = np.arange(RECENT_DAYS - 1, n)
+    starts = ends - RECENT_DAYS + 1
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # V型底：窗口最低点（相同取最左）后 1~10 天内，最高收盘价较低点反弹≥5%
+        low_pos = extrema.min_table.argquery_many(starts, ends)
+        days_after_low = ends - low_pos
+        rebound = (extrema.max_table.query_many(low_pos, ends) - closes[low_pos]) / closes[low_pos]
+        result['V型底'][ends] = (days_after_low > 0) & (days_after_low <= V_REBOUND_DAYS) & (rebound >= V_REBOUND_PCT)
+
+        # W型底：前后半段各一个低点，第二个略高且差值＜2%，之后突破两低点之间的高点
+        mid = RECENT_DAYS // 2
+        first_pos = extrema.min_table.argquery_many(starts, starts + mid - 1)
+        second_pos = extrema.min_table.argquery_many(starts + mid, ends)
+        first_low = closes[first_pos]
+        second_low = closes[second_pos]
+        between_high = extrema.max_table.query_many(first_pos, second_pos - 1)
+        after_high = extrema.max_table.query_many(second_pos, ends)
+        result['W型底'][ends] = ((np.abs(first_low - second_low) / first_low < W_LOW_DIFF)
+                                & (second_low > first_low) & (after_high > between_high))
+
+        # 圆弧底：低点只取决于其前后窗口，全历史只找一次；每个交易日对应连续的一段低点
+        lows = extrema.local_minima(ARC_WINDOW)
+        if len(lows) >= 3:
+            low_idx = np.array([i for i, _ in lows])
+            low_price = np.array([price for _, price in lows])
+            previous, current = low_price[:-1], low_price[1:]
+            bad_pair = (current <= previous) | (np.abs(current - previous) / previous >= arc_low_diff)
+            bad_count = np.concatenate(([0], np.cumsum(bad_pair)))
+
+            first = np.searchsorted(low_idx, starts + ARC_WINDOW, side='left')
+            last = np.searchsorted(low_idx, ends - ARC_WINDOW, side='right') - 1
+            count = last - first + 1
+            enough = count >= 3
+            first_ok = np.where(enough, first, 0)
+            last_ok = np.where(enough, last, 0)
+            ascending = bad_count[last_ok] - bad_count[first_ok] == 0
+            span = low_idx[last_ok] - low_idx[first_ok]
+            result['圆弧底'][ends] = enough & ascending & (span >= ARC_MIN_SPAN)
+
+    return result
+
+
+def scan_boll_touch(history_df, win=BOLL_WIN, k=BOLL_K, tol=TOL):
+    """
+    在每个交易日上判断收盘价/下引线是否接近 BOLL 中轨/下轨
+
+    Args:
+        history_df: 行情数据（含 close, low，按时间升序）
+        win: BOLL 窗口
+        k: BOLL 带宽倍数
+        tol: 接近容差
+
+    Returns:
+        dict: {信号名称: 与 history_df 等长的布尔数组}
+    """
+    g = add_boll(history_df, win, k)
+    close = g['close'].to_numpy(dtype=float)
+    low = g['low'].to_numpy(dtype=float)
+    ma20 = g['MA20'].to_numpy(dtype=float)
+    lower = g['LOWER'].to_numpy(dtype=float)
+
+    def near(a, b):
+        # 与 pct_near 相同：|a-b|/|b| <= tol，任一为 NaN 或 b 为 0 时不成立
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (b != 0) & (np.abs(a - b) / np.abs(b) <= tol)
+
+    return {
+        '收盘价接近中轨': near(close, ma20),
+        '收盘价接近下轨': near(close, lower),
+        '下引线接近中轨': near(low, ma20),
+        '下引线接近下轨': near(low, lower),
+    }
+
+
+def scan_history(stock_name, history_df, win=BOLL_WIN, k=BOLL_K, tol=TOL):
+    """
+    扫描单只股票的全部历史
+
+    Args:
+        stock_name: 股票名称
+        history_df: 行情数据（含 trade_date, close, low，任意顺序）
+        win: BOLL 窗口
+        k: BOLL 带宽倍数
+        tol: 接近容差
+
+    Returns:
+        DataFrame: 信号表（股票名, trade_date, signal），按日期、信号顺序排列
+    """
+    history_df = history_df.sort_values('trade_date').reset_index(drop=True)
+    signals = scan_bottom_patterns(history_df['close'].to_numpy(dtype=float))
+    signals.update(scan_boll_touch(history_df, win, k, tol))
+
+    names = list(signals.keys())
+    rows, cols = np.nonzero(np.column_stack([signals[name] for name in names]))
+    return pd.DataFrame({
+        '股票名': stock_name,
+        'trade_date': history_df['trade_date'].to_numpy()[rows],
+        'signal': np.array(names, dtype=object)[cols],
+    }, columns=SIGNAL_COLUMNS)
+
+
+def scan_store(data_store=None, stock_names=None, win=BOLL_WIN, k=BOLL_K, tol=TOL):
+    """
+    扫描数据存储中全部（或指定）股票的历史
+
+    Args:
+        data_store: 股票数据存储，默认为 stocks_data 目录
+        stock_names: 股票名称列表，None 表示全部
+        win: BOLL 窗口
+        k: BOLL 带宽倍数
+        tol: 接近容差
+
+    Returns:
+        DataFrame: 信号表，另附 板块 列
+    """
+    data_store = data_store if data_store is not None else StockDataStore()
+    tables = []
+    for stock_name, plate, history_df in data_store.iter_histories(
+            stock_names, columns=['ts_code', 'trade_date', 'close', 'low']):
+        try:
+            table = scan_history(stock_name, history_df, win, k, tol)
+        except Exception as e:
+            print(f"扫描 {stock_name} 时出错: {e}")
+            continue
+        table.insert(0, '板块', plate)
+        tables.append(table)
+
+    if not tables:
+        return pd.DataFrame(columns=['板块'] + SIGNAL_COLUMNS)
+    return pd.concat(tables, ignore_index=True)
+
+
+if __name__ == "__main__":
+    signals = scan_store()
+    signals.to_csv('pattern_signals.csv', index=False, encoding='utf-8-sig')
+    print(f"共 {signals['股票名'].nunique()} 只股票，{len(signals)} 条信号，已保存到 pattern_signals.csv")
+    print(signals.groupby('signal').size().to_string())
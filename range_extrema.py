@@ -0,0 +1,143 @@
+"""
+区间极值模块
+稀疏表（Sparse Table）：对一只股票的价格序列预处理一次（O(n log n)），
+之后任意区间 [i, j] 的最大/最小值及其位置都能 O(1) 查询，也可批量查询
+"""
+
+import numpy as np
+
+
+class SparseTable:
+    """区间最值位置查询（相同值取最左边的位置，与 pandas idxmin/idxmax 一致）"""
+
+    def __init__(self, values, mode='min'):
+        """
+        Args:
+            values: 一维数组
+            mode: 'min' 或 'max'
+        """
+        self.values = np.asarray(values, dtype=float)
+        self.mode = mode
+        n = len(self.values)
+        self.table = [np.arange(n)]
+        k = 1
+        while (1 << k) <= n:
+            prev = self.table[-1]
+            half = 1 << (k - 1)
+            size = n - (1 << k) + 1
+            self.table.append(self._pick(prev[:size], prev[half:half + size]))
+            k += 1
+
+    def _pick(self, left, right):
+        """两组位置中取更优者，相同时取左边"""
+        a = self.values[left]
+        b = self.values[right]
+        better = a <= b if self.mode == 'min' else a >= b
+        return np.where(better, left, right)
+
+    def argquery(self, i, j):
+        """
+        区间 [i, j]（含两端）最值的位置
+
+        Args:
+            i: 起始位置
+            j: 结束位置
+
+        Returns:
+            int: 位置
+        """
+        k = (j - i + 1).bit_length() - 1
+        left = self.table[k][i]
+        right = self.table[k][j - (1 << k) + 1]
+        return int(self._pick(np.array([left]), np.array([right]))[0])
+
+    def query(self, i, j):
+        """
+        区间 [i, j]（含两端）的最值
+        """
+        return self.values[self.argquery(i, j)]
+
+    def argquery_many(self, starts, ends):
+        """
+        批量查询多个区间最值的位置
+
+        Args:
+            starts: 起始位置数组
+            ends: 结束位置数组（含）
+
+        Returns:
+            ndarray: 位置数组
+        """
+        starts = np.asarray(starts, dtype=int)
+        ends = np.asarray(ends, dtype=int)
+        if len(starts) == 0:
+            return np.array([], dtype=int)
+        levels = np.floor(np.log2(ends - starts + 1)).astype(int)
+        result = np.empty(len(starts), dtype=int)
+        for k in np.unique(levels):
+            mask = levels == k
+            left = self.table[k][starts[mask]]
+            right = self.table[k][ends[mask] - (1 << k) + 1]
+            result[mask] = self._pick(left, right)
+        return result
+
+    def query_many(self, starts, ends):
+        """
+        批量查询多个区间的最值
+        """
+        return self.values[self.argquery_many(starts, ends)]
+
+
+class RangeExtrema:
+    """价格序列的区间最高/最低值查询"""
+
+    def __init__(self, values):
+        """
+        Args:
+            values: 价格序列（按时间升序）
+        """
+        self.values = np.asarray(values, dtype=float)
+        self.min_table = SparseTable(self.values, 'min')
+        self.max_table = SparseTable(self.values, 'max')
+
+    def __len__(self):
+        return len(self.values)
+
+    def range_min(self, i, j):
+        """区间 [i, j]（含两端）最低值"""
+        return self.min_table.query(i, j)
+
+    def range_max(self, i, j):
+        """区间 [i, j]（含两端）最高值"""
+        return self.max_table.query(i, j)
+
+    def argmin(self, i, j):
+        """区间 [i, j]（含两端）最低值的位置（相同取最左）"""
+        return self.min_table.argquery(i, j)
+
+    def argmax(self, i, j):
+        """区间 [i, j]（含两端）最高值的位置（相同取最左）"""
+        return self.max_table.argquery(i, j)
+
+    def local_minima(self, radius, start=0, end=None):
+        """
+        局部低点：values[i] 等于窗口 values[i-radius:i+radius] 的最低值
+        （左闭右开，与原滑动窗口找低点的写法一致），只检查两侧各留出 radius 根K线的位置
+
+        Args:
+            radius: 窗口半径
+            start: 检查范围起点
+            end: 检查范围终点（不含），默认为序列长度
+
+        Returns:
+            list: [(位置, 价格)]，位置相对于 start
+        """
+        end = len(self.values) if end is None else end
+        positions = np.arange(start + radius, end - radius)
+        if len(positions) == 0:
+            return []
+        # 所有位置的居中窗口最低值一次批量查询，再与各位置的价格整体比较
+        window_min = self.min_table.query_many(positions - radius, positions + radius - 1)
+        values = self.values[positions]
+        mask = values == window_min
+        return list(zip((positions[mask] - start).tolist(), values[mask]))
@@ -0,0 +1,146 @@
+"""
+接口限流模块
+令牌桶限流器，按每分钟请求数控制接口调用频率，遇到限流错误时自适应降速并退避重试
+"""
+
+import time
+import threading
+
+# Tushare 超出频率限制时的错误信息关键字
+THROTTLE_KEYWORDS = ("每分钟最多访问", "最多访问该接口", "访问频率", "rate limit", "too many requests")
+
+# 遇到限流错误后视为额度用尽的秒数（Tushare 按分钟计算额度），期间调用成功则提前恢复
+THROTTLE_WINDOW = 60.0
+
+
+def is_throttle_error(error):
+    """
+    判断异常是否为接口限流错误
+
+    Args:
+        error: 异常对象
+
+    Returns:
+        bool: 是否为限流错误
+    """
+    message = str(error).lower()
+    return any(keyword in message for keyword in THROTTLE_KEYWORDS)
+
+
+class RateLimiter:
+    """令牌桶限流器（线程安全）"""
+
+    def __init__(self, rate_per_minute, burst=None, max_retries=5, backoff=2.0, max_backoff=60.0):
+        """
+        初始化限流器
+
+        Args:
+            rate_per_minute: 每分钟允许的请求数
+            burst: 令牌桶容量，默认为每秒请求数（至少为1）
+            max_retries: 遇到限流错误时的最大重试次数
+            backoff: 首次退避等待秒数，之后每次翻倍
+            max_backoff: 最长退避等待秒数
+        """
+        self.max_rate = rate_per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = burst if burst is not None else max(1.0, self.max_rate)
+        self.tokens = self.capacity
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._updated = time.monotonic()
+        # 最近一次限流错误后额度恢复的时间
+        self._throttled_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按经过的时间补充令牌（调用方需持有锁）"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        获取一个令牌，令牌不足时阻塞等待
+
+        Returns:
+            float: 等待的秒数
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return time.monotonic() - start
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def available(self):
+        """
+        当前可用的令牌数（不消耗令牌）
+
+        Returns:
+            float: 可用令牌数
+        """
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+    def is_throttled(self):
+        """
+        是否处于限流状态（最近遇到过限流错误且之后没有调用成功）
+        令牌暂时不足只需等待，不算限流
+
+        Returns:
+            bool: 是否处于限流状态
+        """
+        with self._lock:
+            return time.monotonic() < self._throttled_until
+
+    def on_success(self):
+        """
+        调用成功后逐步恢复速率
+        """
+        with self._lock:
+            self._throttled_until = 0.0
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttled(self):
+        """
+        遇到限流错误时速率减半并清空令牌
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(self.max_rate * 0.1, self.rate * 0.5)
+            self.tokens = 0
+            self._throttled_until = time.monotonic() + THROTTLE_WINDOW
+
+    def call(self, func, *args, **kwargs):
+        """
+        按限流规则调用函数，遇到限流错误时退避重试
+
+        Args:
+            func: 要调用的函数
+            *args, **kwargs: 函数参数
+
+        Returns:
+            函数返回值
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if not is_throttle_error(e) or attempt >= self.max_retries:
+                    raise
+                self.on_throttled()
+                wait = min(self.max_backoff, self.backoff * (2 ** attempt))
+                attempt += 1
+                print(f"接口限流，{wait:.1f} 秒后第 {attempt} 次重试: {e}")
+                time.sleep(wait)
+                continue
+            self.on_success()
+            return result
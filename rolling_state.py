@@ -0,0 +1,241 @@
+"""
+滚动指标状态模块
+按股票保存 MA5/MA10/MA20 的滚动和/平方和，新K线到来时 O(1) 更新，
+状态可序列化保存，下次运行恢复后只需追加新K线，不必重新滚动计算全部历史
+趋势评分（analyze_stock_status）直接使用状态中的最新均线和10根K线之前的均线
+"""
+
+import os
+import json
+import math
+from collections import deque
+from score_params import DIVERGENCE_LAG
+
+# 默认状态文件（放在数据存储目录下）
+STATE_FILE = 'indicator_state.json'
+
+MA_WINDOWS = (5, 10, 20)
+# 保留最近多少根K线之前的均线（analyze_stock_status 比较10根K线之前的均线）
+MA_LOOKBACK = DIVERGENCE_LAG
+
+
+class RollingStats:
+    """固定窗口的滚动均值/标准差（维护滚动和与平方和）"""
+
+    def __init__(self, window, values=()):
+        """
+        Args:
+            window: 窗口长度
+            values: 初始数据（按时间升序）
+        """
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        # 以首个数据为基准做平移，减小平方和相减时的精度损失
+        self.shift = None
+        self._reset(values)
+
+    def _reset(self, values):
+        """用给定数据重新计算滚动和（恢复状态时使用，消除累计误差）"""
+        self.values.clear()
+        self.values.extend(float(v) for v in list(values)[-self.window:])
+        self.shift = self.values[0] if self.values else None
+        self.total = math.fsum(v - self.shift for v in self.values) if self.values else 0.0
+        self.total_sq = math.fsum((v - self.shift) ** 2 for v in self.values) if self.values else 0.0
+
+    def update(self, value):
+        """
+        追加一个数据，O(1)
+
+        Args:
+            value: 新数据
+        """
+        value = float(value)
+        if self.shift is None:
+            self.shift = value
+        if len(self.values) == self.window:
+            old = self.values[0] - self.shift
+            self.total -= old
+            self.total_sq -= old * old
+        self.values.append(value)
+        new = value - self.shift
+        self.total += new
+        self.total_sq += new * new
+
+    def mean(self, min_periods=None):
+        """
+        窗口均值，数据不足 min_periods（默认为窗口长度）时返回 NaN
+        """
+        count = len(self.values)
+        if count == 0 or count < (self.window if min_periods is None else min_periods):
+            return float('nan')
+        return self.shift + self.total / count
+
+    def std(self, min_periods=None):
+        """
+        窗口总体标准差（ddof=0），数据不足时返回 NaN
+        """
+        count = len(self.values)
+        if count == 0 or count < (self.window if min_periods is None else min_periods):
+            return float('nan')
+        offset = self.total / count
+        return math.sqrt(max(0.0, self.total_sq / count - offset * offset))
+
+
+class IndicatorState:
+    """单只股票的滚动均线状态"""
+
+    def __init__(self, closes=(), last_date=None, history=()):
+        """
+        Args:
+            closes: 最近的收盘价（按时间升序），只保留最长窗口的个数
+            last_date: 最后一根K线的交易日期
+            history: 最近 MA_LOOKBACK + 1 根K线的均线 [[MA5, MA10, MA20], ...]（按时间升序）
+        """
+        self.stats = {window: RollingStats(window, closes) for window in MA_WINDOWS}
+        self.last_date = last_date
+        self.history = deque((list(row) for row in history), maxlen=MA_LOOKBACK + 1)
+
+    @classmethod
+    def from_closes(cls, closes, last_date):
+        """
+        由完整收盘价序列逐根K线计算状态
+
+        Args:
+            closes: 收盘价（按时间升序）
+            last_date: 最后一根K线的交易日期
+
+        Returns:
+            IndicatorState: 状态
+        """
+        closes = list(closes)
+        # 10根K线之前的均线需要再往前一个最长窗口的数据
+        start = max(0, len(closes) - MA_LOOKBACK - 1)
+        state = cls(closes[max(0, start - max(MA_WINDOWS)):start])
+        for close in closes[start:]:
+            state._append(close)
+        state.last_date = last_date
+        return state
+
+    def _append(self, close):
+        """追加一根K线，更新滚动和并记录当前均线，O(1)"""
+        for stats in self.stats.values():
+            stats.update(close)
+        # 与 rolling(window, min_periods=1).mean() 一致
+        self.history.append([self.stats[window].mean(min_periods=1) for window in MA_WINDOWS])
+
+    def update(self, trade_date, close):
+        """
+        追加一根K线；交易日期不晚于已有数据时忽略
+
+        Args:
+            trade_date: 交易日期，格式 YYYYMMDD
+            close: 收盘价
+        """
+        if self.last_date is not None and str(trade_date) <= self.last_date:
+            return
+        self._append(close)
+        self.last_date = str(trade_date)
+
+    def snapshot(self):
+        """
+        最新均线和 MA_LOOKBACK 根K线之前的均线
+
+        Returns:
+            dict: {"MA5": (最新, 10根K线之前), "MA10": ..., "MA20": ...}，K线不足时返回 None
+        """
+        if len(self.history) <= MA_LOOKBACK:
+            return None
+        latest, earlier = self.history[-1], self.history[0]
+        return {f"MA{window}": (latest[i], earlier[i]) for i, window in enumerate(MA_WINDOWS)}
+
+    def to_dict(self):
+        """序列化为可保存的字典（只保存最近的收盘价和均线）"""
+        longest = self.stats[max(MA_WINDOWS)]
+        return {"last_date": self.last_date, "closes": list(longest.values), "history": list(self.history)}
+
+    @classmethod
+    def from_dict(cls, data):
+        """从字典恢复状态"""
+        return cls(data.get("closes", ()), data.get("last_date"), data.get("history", ()))
+
+
+class IndicatorStateBook:
+    """全部股票的滚动均线状态，保存在数据存储目录的一个 JSON 文件中"""
+
+    def __init__(self, store_dir, file_name=STATE_FILE):
+        """
+        Args:
+            store_dir: 数据存储目录
+            file_name: 状态文件名
+        """
+        self.path = os.path.join(store_dir, file_name)
+        self.states = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.states = {name: IndicatorState.from_dict(data) for name, data in json.load(f).items()}
+
+    def get(self, stock_name, last_date=None):
+        """
+        获取股票的滚动均线状态
+
+        Args:
+            stock_name: 股票名称
+            last_date: 期望的最后交易日，给定时只返回与之一致的状态（与数据存储不一致的状态视为过期）
+
+        Returns:
+            IndicatorState: 状态，不存在或已过期时返回 None
+        """
+        state = self.states.get(stock_name)
+        if state is None or (last_date is not None and state.last_date != str(last_date)):
+            return None
+        return state
+
+    def rebuild(self, stock_name, history_df):
+        """
+        根据完整历史数据重建状态
+
+        Args:
+            stock_name: 股票名称
+            history_df: 历史数据（含 trade_date, close，任意顺序）
+        """
+        history_df = history_df.sort_values('trade_date')
+        last_date = str(history_df['trade_date'].iloc[-1]) if len(history_df) else None
+        self.states[stock_name] = IndicatorState.from_closes(history_df['close'].tolist(), last_date)
+
+    def apply(self, stock_name, new_df, stored_last_date):
+        """
+        追加新K线，O(新K线数)；状态与已保存数据不一致时需要调用 rebuild
+
+        Args:
+            stock_name: 股票名称
+            new_df: 新下载的K线（含 trade_date, close，任意顺序）
+            stored_last_date: 合并前已保存数据的最后交易日
+
+        Returns:
+            bool: 是否已追加；没有状态或状态与已保存数据不一致时返回 False
+        """
+        state = self.get(stock_name, stored_last_date)
+        if state is None:
+            return False
+        new_bars = new_df[new_df['trade_date'] > state.last_date].sort_values('trade_date')
+        for trade_date, close in zip(new_bars['trade_date'], new_bars['close']):
+            state.update(trade_date, close)
+        return True
+
+    def retain(self, stock_names):
+        """
+        只保留指定股票的状态
+        """
+        self.states = {name: self.states[name] for name in stock_names if name in self.states}
+
+    def save(self):
+        """
+        保存状态文件
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({name: state.to_dict() for name, state in self.states.items()}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,100 @@
+"""
+趋势评分参数模块
+analyze_stock_status（单日评分）、backtest.score_history（整段历史评分）和 pattern_scanner（底部形态扫描）
+共用的评分常数；parameter_sweep 扫描其中的可调参数，选出的参数保存到 score_params.json，
+两种评分都从这里读取，扫描结果对每日评分和回测同时生效
+"""
+
+import os
+import json
+
+# 参数文件（相对当前工作目录），不存在时使用下面的默认值
+SCORE_PARAMS_FILE = 'score_params.json'
+
+# 阶段新高
+HIGH_LOOKBACK = 180         # 阶段新高回看天数
+PERFECT_HIGH_TOL = 0.005    # 完美新高：与180日最高价相差≤0.5%
+NEAR_HIGH_RATIO = 0.95      # 接近新高：收盘价≥180日最高价的95%
+
+# 均线结构
+MA_ENTANGLE = 0.01          # 均线缠绕：两两差值＜1%
+DIVERGENCE_LAG = 10         # 均线斜率：与10根K线之前比较
+DIVERGENCE_STRONG = 0.01    # 多头发散度强：MA5 与 MA20 斜率差≥1%
+DIVERGENCE_MEDIUM = 0.005   # 多头发散度中等：斜率差≥0.5%
+CLOSE_STRENGTH_RATIO = 1.03  # 收盘价站均线：高于均线3%
+
+# 底部形态
+RECENT_DAYS = 60            # 形态判断使用最近60个交易日
+V_REBOUND_DAYS = 10         # V型底：低点后反弹时间≤10个交易日
+V_REBOUND_PCT = 0.05        # V型底：反弹幅度≥5%
+W_LOW_DIFF = 0.02           # W型底：两低点收盘价差值＜2%
+ARC_WINDOW = 5              # 圆弧底：找低点的滑动窗口半径
+ARC_LOW_DIFF = 0.03         # 圆弧底：相邻低点差值＜3%
+ARC_MIN_SPAN = 20           # 圆弧底：低点时间跨度≥20个交易日
+
+# 得分状态（得分下限, 状态），低于最后一档为 LOWEST_LEVEL
+SCORE_LEVELS = ((80, '【极强多头】'), (60, '【中度多头】'), (40, '【震荡整理】'), (20, '【中度空头】'))
+LOWEST_LEVEL = '【极强空头】'
+
+# 参数扫描可调整的得分参数及默认值（参数名与 score_history 的参数一致）
+DEFAULT_SCORE_PARAMS = {
+    'perfect_high_tol': PERFECT_HIGH_TOL,
+    'near_high_ratio': NEAR_HIGH_RATIO,
+    'ma_entangle': MA_ENTANGLE,
+    'arc_low_diff': ARC_LOW_DIFF,
+}
+
+# 进程内已加载的参数
+_current = None
+
+
+def load_score_params(path=SCORE_PARAMS_FILE):
+    """
+    读取得分参数：默认值，被参数文件中的值覆盖
+
+    Args:
+        path: 参数文件路径
+
+    Returns:
+        dict: 得分参数
+    """
+    params = dict(DEFAULT_SCORE_PARAMS)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        unknown = set(saved) - set(params)
+        if unknown:
+            print(f"忽略未知的得分参数: {', '.join(sorted(unknown))}")
+        params.update({name: float(value) for name, value in saved.items() if name in params})
+    return params
+
+
+def current_score_params():
+    """
+    当前进程使用的得分参数（首次调用时读取参数文件）
+
+    Returns:
+        dict: 得分参数
+    """
+    global _current
+    if _current is None:
+        _current = load_score_params()
+    return _current
+
+
+def save_score_params(params, path=SCORE_PARAMS_FILE):
+    """
+    保存得分参数，下次运行时 analyze_stock_status 和回测使用
+
+    Args:
+        params: 得分参数（只保存 DEFAULT_SCORE_PARAMS 中的参数）
+        path: 参数文件路径
+    """
+    global _current
+    params = {name: float(value) for name, value in params.items() if name in DEFAULT_SCORE_PARAMS}
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(params, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    if path == SCORE_PARAMS_FILE:
+        _current = None
@@ -4,40 +4,120 @@
 """
 
 import pandas as pd
-import akshare as ak
 import tushare as ts
+import time
 import traceback
-from datetime import datetime
-from config import TUSHARE_TOKEN
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+from rate_limiter import RateLimiter, is_throttle_error
+from trade_calendar import TradeCalendar
+from data_source import DataSourceRouter, TushareSource, AkShareSource, BaostockSource, QuotaExceededError, NoDataError
+from config import TUSHARE_TOKEN, API_LIMIT_COUNT, API_SLEEP_TIME
+
+# 并发获取时的默认线程数
+FETCH_WORKERS = 4
+# 获取失败时的重试次数和首次退避秒数（之后每次翻倍）
+FETCH_RETRIES = 3
+FETCH_BACKOFF = 2.0
+# 可重试的临时故障：网络连接、超时、接口限流
+TRANSIENT_ERRORS = (ConnectionError, TimeoutError, RequestsConnectionError, RequestsTimeout, QuotaExceededError)
+
+
+def is_transient_error(error):
+    """
+    判断异常是否为可重试的临时故障（网络、超时或限流）
+
+    Args:
+        error: 异常对象
+
+    Returns:
+        bool: 是否为临时故障
+    """
+    return isinstance(error, TRANSIENT_ERRORS) or is_throttle_error(error)
 
 class StockDataFetcher:
     """股票数据获取器"""
     
-    def __init__(self):
-        """初始化股票数据获取器"""
+    def __init__(self, rate_per_minute=None):
+        """
+        初始化股票数据获取器
+        
+        Args:
+            rate_per_minute: Tushare 每分钟请求数上限，默认按 API_LIMIT_COUNT / API_SLEEP_TIME 换算
+        """
         ts.set_token(TUSHARE_TOKEN)
         self.pro = ts.pro_api()
+        if rate_per_minute is None:
+            rate_per_minute = API_LIMIT_COUNT * 60 / API_SLEEP_TIME
+        self.rate_limiter = RateLimiter(rate_per_minute)
+        # 按延迟和额度在多个数据源之间路由，出错时自动切换
+        tushare_source = TushareSource(self.pro, self.rate_limiter)
+        akshare_source = AkShareSource()
+        baostock_source = BaostockSource()
+        self.data_source = DataSourceRouter([tushare_source, akshare_source, baostock_source])
+        # 交易日历优先使用 AkShare，不占用 Tushare 额度
+        self.trade_calendar = TradeCalendar(
+            source=DataSourceRouter([akshare_source, tushare_source, baostock_source])
+        )
+    
+    def call_api(self, api_name, **kwargs):
+        """
+        经限流器调用 Tushare 接口
+        
+        Args:
+            api_name: 接口名称，如 'daily'
+            **kwargs: 接口参数
+            
+        Returns:
+            DataFrame: 接口返回数据
+        """
+        return self.rate_limiter.call(getattr(self.pro, api_name), **kwargs)
     
+    def call_with_retry(self, func, *args, retries=FETCH_RETRIES, backoff=FETCH_BACKOFF, **kwargs):
+        """
+        调用函数，遇到临时故障（网络、超时或限流）时按指数退避重试，
+        其他错误（无数据、参数错误等）直接抛出，不浪费重试时间
+        
+        Args:
+            func: 要调用的函数
+            *args, **kwargs: 函数参数
+            retries: 最大重试次数
+            backoff: 首次退避等待秒数，之后每次翻倍
+            
+        Returns:
+            函数返回值
+        """
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= retries or not is_transient_error(e):
+                    raise
+                wait = backoff * (2 ** attempt)
+                attempt += 1
+                print(f"调用失败，{wait:.1f} 秒后第 {attempt} 次重试: {e}")
+                time.sleep(wait)
+    
+    def get_trade_dates(self, start=0, end=99):
+        """
+        获取交易日期列表（升序）
+        返回: 从起始交易日到最近交易日的日期列表，格式为 YYYYMMDD
+        """
+        trade_dates = self.trade_calendar.dates
+        idx = self.trade_calendar.index_on_or_before()
+        
+        # 获取最近100个交易日（含当日，共100天数据）
+        return trade_dates[max(start, idx-end):idx + 1]
+
     def get_stock_date(self, start=0, end=99):
         """
         获取交易日期范围
         返回: (start_date, end_date) 格式为 YYYYMMDD
         """
-        print("获取股票交易日期")
-        
-        trade_df = ak.tool_trade_date_hist_sina()
-
-        print(trade_df)
-
-        # 确保日期列是字符串格式
-        trade_dates = pd.to_datetime(trade_df['trade_date']).dt.strftime('%Y%m%d').tolist()
-        current_date = datetime.now().strftime('%Y%m%d')
-        
-        latest_date = max(d for d in trade_dates if d <= current_date)
-        idx = trade_dates.index(latest_date)
-        
-        # 获取最近100个交易日的起始日期（含当日，共100天数据）
-        start_date = trade_dates[max(start, idx-end)]
+        trade_dates = self.get_trade_dates(start=start, end=end)
+        start_date = trade_dates[0]
+        latest_date = trade_dates[-1]
 
         print(start_date)
         print(latest_date)
@@ -74,14 +154,7 @@ class StockDataFetcher:
         new_stock_code = f"{code}.{exchange}"
         
         # 获取历史数据
-        history_df = self.pro.daily(
-            ts_code=new_stock_code, 
-            start_date=start_date, 
-            end_date=end_date
-        )
-        
-        if history_df is None or history_df.empty:
-            raise Exception((f"{code} 出现异常: {str(e)}"))
+        history_df = self.data_source.get_daily(new_stock_code, start_date, end_date)
 
         return history_df
         # try:
@@ -95,6 +168,95 @@ class StockDataFetcher:
         #     traceback.print_exc()
         #     raise Exception(f"获取股票历史数据错误 {stock_code}: {e}")
 
+    def fetch_histories(self, stock_codes, start_date, end_date, workers=FETCH_WORKERS, on_complete=None, on_no_data=None):
+        """
+        并发获取多只股票的历史数据
+        所有线程共享同一个限流器，总调用频率不超过接口额度；临时故障按指数退避重试
+        
+        Args:
+            stock_codes: 股票代码列表，格式如 'SH.600000'
+            start_date: 开始日期，格式 YYYYMMDD；也可以是 {股票代码: 开始日期}
+            end_date: 结束日期，格式 YYYYMMDD
+            workers: 并发线程数
+            on_complete: 每只股票获取成功后的回调 on_complete(股票代码, DataFrame)，在调用线程中执行；
+                         提供回调时数据交给回调处理后即释放，不保留在返回结果中
+            on_no_data: 数据源确认区间内无数据时的回调 on_no_data(股票代码)，返回 True 表示无需更新（不计为失败）
+            
+        Returns:
+            tuple: (成功数据 {股票代码: DataFrame}, 失败信息 {股票代码: 错误信息})
+        """
+        histories = {}
+        errors = {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {}
+            for stock_code in stock_codes:
+                code_start = start_date[stock_code] if isinstance(start_date, dict) else start_date
+                future = executor.submit(self.call_with_retry, self.get_stock_history2, stock_code, code_start, end_date)
+                futures[future] = stock_code
+            
+            success_count = 0
+            for future in as_completed(futures):
+                stock_code = futures.pop(future)
+                try:
+                    history_df = future.result()
+                except NoDataError as e:
+                    if on_no_data is not None and on_no_data(stock_code):
+                        print(f"股票 {stock_code} 区间内暂无新数据，保留已有数据")
+                        continue
+                    print(f"获取股票 {stock_code} 历史数据失败: {e}")
+                    errors[stock_code] = str(e)
+                    continue
+                except Exception as e:
+                    print(f"获取股票 {stock_code} 历史数据失败: {e}")
+                    errors[stock_code] = str(e)
+                    continue
+                success_count += 1
+                if on_complete is not None:
+                    on_complete(stock_code, history_df)
+                else:
+                    histories[stock_code] = history_df
+        
+        print(f"并发获取完成，成功 {success_count} 只，失败 {len(errors)} 只")
+        return histories, errors
+
+    def get_stock_histories_by_date(self, stock_codes, trade_dates):
+        """
+        按交易日批量获取股票历史数据（截面模式）
+        每个交易日调用一次 pro.daily(trade_date=...) 获取全市场日线，
+        再按股票拆分为各自的历史数据，调用次数只与交易日数量有关，与股票池大小无关
+        
+        Args:
+            stock_codes: 股票代码列表，格式如 'SH.600000'
+            trade_dates: 交易日期列表，格式 YYYYMMDD
+            
+        Returns:
+            dict: {原始股票代码: DataFrame}，每只股票按交易日期降序排列，与 get_stock_history2 一致
+        """
+        wanted = {self.get_ts_code(stock_code): stock_code for stock_code in stock_codes}
+        
+        frames = []
+        for trade_date in trade_dates:
+            print(f"获取全市场日线数据 {trade_date}")
+            daily_df = self.call_with_retry(self.call_api, 'daily', trade_date=trade_date)
+            if daily_df is None or daily_df.empty:
+                print(f"交易日 {trade_date} 无数据")
+                continue
+            frames.append(daily_df[daily_df['ts_code'].isin(wanted)])
+        
+        if not frames:
+            return {}
+        
+        market_df = pd.concat(frames, ignore_index=True)
+        market_df = market_df.sort_values(['ts_code', 'trade_date'], ascending=[True, False])
+        
+        histories = {}
+        for ts_code, history_df in market_df.groupby('ts_code', sort=False):
+            histories[wanted[ts_code]] = history_df.reset_index(drop=True)
+        
+        print(f"截面模式获取完成，{len(trade_dates)} 个交易日，{len(histories)} 只股票")
+        return histories
+
     def get_stock_history(self, stock_code, start_date, end_date):
         """
         获取股票历史数据
@@ -126,14 +288,7 @@ class StockDataFetcher:
         new_stock_code = f"{code}.{exchange}"
         
         # 获取历史数据
-        history_df = self.pro.daily(
-            ts_code=new_stock_code, 
-            start_date=start_date, 
-            end_date=end_date
-        )
-        
-        if history_df is None or history_df.empty:
-            raise Exception((f"{code} 出现异常: {str(e)}"))
+        history_df = self.data_source.get_daily(new_stock_code, start_date, end_date)
 
         try:
             history_df = history_df[["trade_date", "open", "high", "low", "close", "pct_chg"]].sort_values("trade_date")
@@ -168,4 +323,17 @@ class StockDataFetcher:
         else:
             exchange = 'SH'  # 默认
             
-        return code, exchange
\ No newline at end of file
+        return code, exchange
+
+    def get_ts_code(self, stock_code):
+        """
+        转换为 Tushare 股票代码
+        
+        Args:
+            stock_code: 原始股票代码，格式如 'SH.600000'
+            
+        Returns:
+            str: Tushare 代码，格式如 '600000.SH'
+        """
+        code, exchange = self.parse_stock_code(stock_code)
+        return f"{code}.{exchange}"
\ No newline at end of file
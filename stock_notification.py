@@ -11,8 +11,8 @@ class StockNotification:
         从pool sheet获取名称和支撑价位，与watch sheet的close价格比较
         """
         try:
-            # 从pool sheet获取名称和支撑价位，过滤空值
-            pool_df = self.excel_handler.read_data_from_sheet(self.current_sheet_name)  
+            # 从pool sheet获取名称和支撑价位，过滤空值（只读取用到的列）
+            pool_df = self.excel_handler.read_data_from_sheet(self.current_sheet_name, columns=['名称', '支撑价位', '核心'])
             support_data = {
                 row['名称']: row['支撑价位'] 
                 for _, row in pool_df.iterrows() 
@@ -24,7 +24,7 @@ class StockNotification:
             focus_names = focus_rows['名称'].tolist()
 
             # 从watch sheet获取名称和close价格
-            watch_df = self.excel_handler.read_data_from_sheet(self.target_sheet_name)
+            watch_df = self.excel_handler.read_data_from_sheet(self.target_sheet_name, columns=['名称', 'close'])
             
             # 比较支撑位和close价格
             stock_notices = []
@@ -6,14 +6,22 @@
 import time
 import numpy as np
 import traceback
-from collections import defaultdict
 from stock_data import StockDataFetcher
 from excel_handler import ExcelHandler
+from stock_store import StockDataStore
+from indicator_engine import IndicatorPanel
+from analysis_pool import run_per_stock, ANALYSIS_WORKERS
 from config import API_LIMIT_COUNT, API_SLEEP_TIME
 import support_buy_scanner
 import check_ma_converge
 import pandas as pd
-import json
+
+# watch 工作表使用的行情列
+WATCH_HISTORY_COLUMNS = ['ts_code', 'trade_date', 'close', 'low', 'pct_chg']
+
+# watch 工作表中日期列之前的固定列
+WATCH_COLUMNS = ["板块", "名称", "代码", "5天求和", "10天求和", "20天求和", "BOLL", "均线状态", "close"]
+WATCH_NUMERIC_COLUMNS = {"5天求和", "10天求和", "20天求和", "close"}
 
 class StockDataProcessor:
     """股票数据处理器 - 整合所有功能的主处理类"""
@@ -29,18 +37,20 @@ class StockDataProcessor:
         self.data_fetcher = StockDataFetcher()
         #self.technical_analyzer = TechnicalAnalyzer()
         self.excel_handler = ExcelHandler(file_path)
+        self.data_store = StockDataStore()
     
-    def read_data_from_sheet(self, sheet_name):
+    def read_data_from_sheet(self, sheet_name, columns=None):
         """
         从工作表读取数据
         
         Args:
             sheet_name: 工作表名称
+            columns: 只读取这些列，None 表示全部列
             
         Returns:
             DataFrame: 读取的数据
         """
-        return self.excel_handler.read_data_from_sheet(sheet_name)
+        return self.excel_handler.read_data_from_sheet(sheet_name, columns)
     
     def get_stock_date(self):
         """
@@ -65,7 +75,8 @@ class StockDataProcessor:
         """
         return self.data_fetcher.get_stock_history(stock_code, start_date, current_date)
     
-    def _calculate_trend_signal(self, history_df):
+    @staticmethod
+    def _calculate_trend_signal(history_df):
         """
         使用 support_buy_scanner 计算趋势信号
         
@@ -82,8 +93,12 @@ class StockDataProcessor:
             if history_df is None or history_df.empty:
                 return "无数据"
             
-            # 添加布林带计算
-            df_with_boll = support_buy_scanner.add_boll(history_df.copy())
+            # 添加布林带计算（已由指标面板计算时直接使用）
+            if "LOWER" in history_df.columns:
+                df_with_boll = history_df
+            else:
+                # add_boll 内部已复制数据，无需再复制
+                df_with_boll = support_buy_scanner.add_boll(history_df)
             
             if df_with_boll.empty:
                 return "数据不足"
@@ -125,7 +140,109 @@ class StockDataProcessor:
         else:
             return np.nan
 
-    def process_stock_data(self, current_sheet_name, target_sheet_name):
+    @staticmethod
+    def prepare_watch_frames(histories):
+        """
+        准备 watch 工作表的分析数据：每只股票取最近30天，一次性计算所有股票的BOLL和均线
+        
+        Args:
+            histories: 可迭代的 (股票名称, 板块, 历史数据)，历史数据按日期降序
+            
+        Returns:
+            dict: {股票名称: (板块, 附加了指标列的历史数据)}
+        """
+        # 仅保留最近30天数据
+        frames = {}
+        plates = {}
+        for stock_name, plate, history_df in histories:
+            frames[stock_name] = history_df.head(30)
+            plates[stock_name] = plate
+
+        # 一次性计算所有股票的BOLL和均线
+        panel = IndicatorPanel(frames)
+        indicators = panel.boll(support_buy_scanner.BOLL_WIN, support_buy_scanner.BOLL_K)
+        indicators.update(ma5=panel.ma(5), ma10=panel.ma(10), ma20=panel.ma(20))
+
+        return {stock_name: (plates[stock_name], panel.frame(stock_name, history_df, **indicators))
+                for stock_name, history_df in frames.items()}
+
+    @staticmethod
+    def _analyze_watch_row(stock_name, plate, history_df):
+        """
+        计算单只股票在 watch 工作表中的一行（可在子进程中执行）
+        
+        Args:
+            stock_name: 股票名称
+            plate: 板块名称
+            history_df: 附加了指标列的历史数据
+            
+        Returns:
+            dict: 各列的值，"涨跌幅" 为最近20天的 [(交易日期, 涨跌幅)]
+        """
+        # 获取股票代码（假设history_df的第一行包含代码信息）
+        code = history_df.iloc[0].get('ts_code', '')
+        
+        trend = StockDataProcessor._calculate_trend_signal(history_df)
+        # 计算均线粘合
+        ma_status = check_ma_converge.check_ma_converge(history_df)
+
+        history_df = history_df.sort_values('trade_date', ascending=False)
+
+        # 计算各项指标
+        five_pct_sum = round(history_df["pct_chg"].head(5).sum(), 2)
+        ten_pct_sum = round(history_df["pct_chg"].head(10).sum(), 2)
+        twenty_pct_sum = round(history_df["pct_chg"].head(20).sum(), 2)
+        
+        print(f"计算指标 - 5天: {five_pct_sum}, 10天: {ten_pct_sum}, 20天: {twenty_pct_sum}, 趋势: {trend}")
+        
+        recent = history_df.head(20)
+        return {
+            "板块": plate,
+            "名称": stock_name,
+            "代码": code,
+            "5天求和": five_pct_sum,
+            "10天求和": ten_pct_sum,
+            "20天求和": twenty_pct_sum,
+            "BOLL": trend,
+            "均线状态": ma_status,
+            "close": round(history_df.iloc[0]["close"], 2),
+            "涨跌幅": [(date, round(pct_change, 2)) for date, pct_change in zip(recent["trade_date"], recent["pct_chg"])],
+        }
+
+    @staticmethod
+    def _build_watch_table(rows):
+        """
+        按列组装 watch 工作表
+        固定列写入预先分配的数组，日期列由全部股票的 (行, 日期, 涨跌幅) 一次性透视得到，
+        日期列按首次出现的顺序排列，股票没有的日期为空
+        
+        Args:
+            rows: _analyze_watch_row 的结果列表（按股票顺序）
+            
+        Returns:
+            DataFrame: watch 工作表数据
+        """
+        count = len(rows)
+        columns = {key: np.empty(count, dtype=float if key in WATCH_NUMERIC_COLUMNS else object)
+                   for key in WATCH_COLUMNS}
+        positions, dates, changes = [], [], []
+        for i, row in enumerate(rows):
+            for key in WATCH_COLUMNS:
+                columns[key][i] = row[key]
+            for date, pct_change in row["涨跌幅"]:
+                positions.append(i)
+                dates.append(date)
+                changes.append(pct_change)
+
+        codes, unique_dates = pd.factorize(pd.Series(dates, dtype=object))
+        pivot = np.full((count, len(unique_dates)), np.nan)
+        pivot[np.asarray(positions, dtype=int), codes] = changes
+
+        result_df = pd.DataFrame(columns)
+        date_df = pd.DataFrame(pivot, columns=list(unique_dates), index=result_df.index)
+        return pd.concat([result_df, date_df], axis=1)
+
+    def process_stock_data(self, current_sheet_name, target_sheet_name, workers=ANALYSIS_WORKERS):
         """
         处理股票数据的主要流程
         从源工作表读取股票列表，获取历史数据，计算指标，写入目标工作表
@@ -133,60 +250,18 @@ class StockDataProcessor:
         Args:
             current_sheet_name: 源工作表名称
             target_sheet_name: 目标工作表名称
+            workers: 分析使用的进程数，1 表示顺序执行
         """
-        with open('stocks_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
         try:
-            merged_data = defaultdict(list)
-
-            for stock_name, stock_data in data.items():
-                plate = stock_data["plate"]
-                history = stock_data["history"]
-
-                #merged_data["代码"].append(stock_code)
-                merged_data["板块"].append(plate)
-                merged_data["名称"].append(stock_name)# 仅保留最近30天数据
-                history_df = pd.DataFrame(history).head(30)
-                # 获取股票代码（假设history_df的第一行包含代码信息）
-                code = history_df.iloc[0].get('ts_code', '')
-                merged_data["代码"].append(code)
-                
-                trend = self._calculate_trend_signal(history_df)
-                # 计算均线粘合
-                ma_status = check_ma_converge.check_ma_converge(history_df)
-
-                history_df = history_df.sort_values('trade_date', ascending=False)
-
-                # 计算各项指标
-                five_pct_sum = round(history_df["pct_chg"].head(5).sum(), 2)
-                ten_pct_sum = round(history_df["pct_chg"].head(10).sum(), 2)
-                twenty_pct_sum = round(history_df["pct_chg"].head(20).sum(), 2)
-                
-                print(f"计算指标 - 5天: {five_pct_sum}, 10天: {ten_pct_sum}, 20天: {twenty_pct_sum}, 趋势: {trend}")
-                
-                # 添加指标数据
-                merged_data["5天求和"].append(five_pct_sum)
-                merged_data["10天求和"].append(ten_pct_sum)
-                merged_data["20天求和"].append(twenty_pct_sum)
-                merged_data["BOLL"].append(trend)
-                merged_data["均线状态"].append(ma_status)
-
-                latest_close = round(history_df.iloc[0]["close"], 2)
-                merged_data["close"].append(latest_close)
-                
-                for _, record in history_df.head(20).iterrows():
-                    date = record["trade_date"]
-                    pct_change = round(record["pct_chg"], 2)
-                    merged_data[date].append(pct_change)
-
-                max_len = max(len(v) for v in merged_data.values())
-                for key in merged_data:
-                    if len(merged_data[key]) < max_len:
-                        merged_data[key].extend([np.nan] * (max_len - len(merged_data[key])))
-
-            if merged_data:
-                result_df = pd.DataFrame(merged_data)
+            frames = self.prepare_watch_frames(self.data_store.iter_histories(columns=WATCH_HISTORY_COLUMNS))
+
+            # 逐只股票分析（可分给多个进程），结果按股票顺序返回
+            items = [(stock_name, (stock_name, plate, history_df))
+                     for stock_name, (plate, history_df) in frames.items()]
+            rows = [row for _, row in run_per_stock(StockDataProcessor._analyze_watch_row, items, workers)]
+
+            if rows:
+                result_df = self._build_watch_table(rows)
                 self.append_data_to_sheet(result_df, target_sheet_name)
                 print(f"数据处理完成，共处理 {len(result_df)} 只股票")
             else:
@@ -0,0 +1,253 @@
+"""
+股票数据存储模块
+按股票分文件保存历史行情（NumPy 列式格式），替代单个 stocks_data.json
+每只股票一个 .npz 文件，每列一个定长类型数组，读取时可只加载需要的股票和列
+首次使用（存储目录还没有索引）时，如果旧版 stocks_data.json 存在，自动导入其中的数据
+"""
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# 默认存储目录（相对当前工作目录，与原 stocks_data.json 位置一致）
+STORE_DIR = 'stocks_data'
+INDEX_FILE = 'index.json'
+# 旧版数据文件（与存储目录同级）
+LEGACY_JSON_FILE = 'stocks_data.json'
+
+# 文本列，其余列按 float64 保存
+TEXT_COLUMNS = ('ts_code', 'trade_date')
+
+
+class StockDataStore:
+    """股票历史数据列式存储"""
+
+    def __init__(self, store_dir=STORE_DIR, legacy_json_path=None):
+        """
+        初始化存储
+
+        Args:
+            store_dir: 存储目录
+            legacy_json_path: 旧版 stocks_data.json 路径，默认为存储目录同级的 stocks_data.json
+        """
+        self.store_dir = store_dir
+        self.index_path = os.path.join(store_dir, INDEX_FILE)
+        self.legacy_json_path = (legacy_json_path if legacy_json_path is not None
+                                 else os.path.join(os.path.dirname(os.path.normpath(store_dir)), LEGACY_JSON_FILE))
+        self._index = None
+
+    @property
+    def index(self):
+        """
+        股票索引 {股票名称: {"plate": 板块, "file": 文件名, "rows": 行数, "last_date": 最后交易日,
+                  "no_bar_dates": 数据源确认无行情的交易日（停牌等）}}
+        """
+        if self._index is None:
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)
+            elif os.path.exists(self.legacy_json_path):
+                # 首次使用：从旧版 JSON 导入（导入后写出索引，之后不再导入；旧文件保留不删除）
+                print(f"数据存储 {self.store_dir} 还没有索引，从旧版 {self.legacy_json_path} 导入")
+                self.import_json(self.legacy_json_path)
+            else:
+                self._index = {}
+        return self._index
+
+    def symbols(self):
+        """
+        获取已保存的股票名称列表
+
+        Returns:
+            list: 股票名称列表
+        """
+        return list(self.index.keys())
+
+    def get_plate(self, stock_name):
+        """
+        获取股票所属板块
+
+        Args:
+            stock_name: 股票名称
+
+        Returns:
+            str: 板块名称
+        """
+        return self.index[stock_name]["plate"]
+
+    def get_no_bar_dates(self, stock_name):
+        """
+        获取数据源确认无行情的交易日（停牌等）
+
+        Args:
+            stock_name: 股票名称
+
+        Returns:
+            list: 交易日列表（升序），旧版索引中没有该字段时返回空列表
+        """
+        return self.index.get(stock_name, {}).get("no_bar_dates", [])
+
+    def write_symbol(self, stock_name, plate, history_df, no_bar_dates=None):
+        """
+        保存单只股票的历史数据（仅更新内存中的索引，需调用 save_index 落盘）
+
+        Args:
+            stock_name: 股票名称
+            plate: 板块名称
+            history_df: 历史数据 DataFrame
+            no_bar_dates: 数据源确认无行情的交易日列表（停牌等），用于增量更新时跳过这些日期的缺口检查
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+
+        file_name = self._file_name(stock_name, history_df)
+        arrays = {}
+        for column in history_df.columns:
+            if column in TEXT_COLUMNS:
+                arrays[column] = history_df[column].astype(str).to_numpy(dtype=str)
+            else:
+                arrays[column] = pd.to_numeric(history_df[column], errors='coerce').to_numpy(dtype=np.float64)
+
+        file_path = os.path.join(self.store_dir, file_name)
+        tmp_path = f"{file_path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, file_path)
+
+        self.index[stock_name] = {
+            "plate": plate,
+            "file": file_name,
+            "rows": len(history_df),
+            "last_date": str(history_df['trade_date'].max()) if 'trade_date' in history_df.columns and len(history_df) else None,
+            "no_bar_dates": sorted(no_bar_dates or [])
+        }
+
+    def save_index(self):
+        """
+        保存股票索引，并删除索引中已不存在的股票数据文件
+        """
+        os.makedirs(self.store_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        self._remove_orphans()
+
+    def save(self, all_data):
+        """
+        全量保存股票数据，替换原有内容
+
+        Args:
+            all_data: {股票名称: {"plate": 板块, "history": DataFrame}}
+        """
+        self._index = {}
+        for stock_name, stock_data in all_data.items():
+            self.write_symbol(stock_name, stock_data["plate"], stock_data["history"])
+        self.save_index()
+        print(f"股票数据已保存到 {self.store_dir}，共 {len(all_data)} 只股票")
+
+    def retain(self, stock_names):
+        """
+        只保留指定股票的数据，并按给定顺序排列（需调用 save_index 落盘，落盘时删除其余股票的数据文件）
+
+        Args:
+            stock_names: 需要保留的股票名称列表
+        """
+        self._index = {name: self.index[name] for name in stock_names if name in self.index}
+
+    def import_json(self, json_path=LEGACY_JSON_FILE):
+        """
+        从旧版 stocks_data.json 导入数据，替换存储中的原有内容
+        （索引不存在时读取索引会自动调用；也可通过 python xgboost.py import_json 手动重新导入）
+
+        Args:
+            json_path: JSON 文件路径
+        """
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        self.save({
+            stock_name: {"plate": stock_data["plate"], "history": pd.DataFrame(stock_data["history"])}
+            for stock_name, stock_data in data.items()
+        })
+
+    def load_arrays(self, stock_name, columns=None):
+        """
+        读取单只股票的列数组
+
+        Args:
+            stock_name: 股票名称
+            columns: 需要的列，None 表示全部列
+
+        Returns:
+            dict: {列名: ndarray}
+        """
+        file_path = os.path.join(self.store_dir, self.index[stock_name]["file"])
+        with np.load(file_path, allow_pickle=False) as data:
+            names = data.files if columns is None else [c for c in columns if c in data.files]
+            return {name: data[name] for name in names}
+
+    def load_history(self, stock_name, columns=None):
+        """
+        读取单只股票的历史数据
+
+        Args:
+            stock_name: 股票名称
+            columns: 需要的列，None 表示全部列
+
+        Returns:
+            DataFrame: 历史数据，行顺序与保存时一致
+        """
+        return pd.DataFrame(self.load_arrays(stock_name, columns))
+
+    def iter_histories(self, stock_names=None, columns=None):
+        """
+        逐只股票读取历史数据
+
+        Args:
+            stock_names: 需要的股票名称列表，None 表示全部股票
+            columns: 需要的列，None 表示全部列
+
+        Yields:
+            tuple: (股票名称, 板块, DataFrame)
+        """
+        names = self.symbols() if stock_names is None else stock_names
+        for stock_name in names:
+            if stock_name not in self.index:
+                print(f"股票 {stock_name} 不在数据存储中")
+                continue
+            yield stock_name, self.get_plate(stock_name), self.load_history(stock_name, columns)
+
+    def load(self, stock_names=None, columns=None):
+        """
+        读取多只股票的历史数据
+
+        Args:
+            stock_names: 需要的股票名称列表，None 表示全部股票
+            columns: 需要的列，None 表示全部列
+
+        Returns:
+            dict: {股票名称: {"plate": 板块, "history": DataFrame}}
+        """
+        return {
+            stock_name: {"plate": plate, "history": history_df}
+            for stock_name, plate, history_df in self.iter_histories(stock_names, columns)
+        }
+
+    def _file_name(self, stock_name, history_df):
+        """
+        生成股票数据文件名，优先使用 ts_code
+        """
+        if stock_name in self.index:
+            return self.index[stock_name]["file"]
+        if 'ts_code' in history_df.columns and not history_df.empty:
+            return f"{history_df['ts_code'].iloc[0]}.npz"
+        return f"{stock_name}.npz"
+
+    def _remove_orphans(self):
+        """
+        删除索引中已不存在的股票数据文件
+        """
+        files = {entry["file"] for entry in self.index.values()}
+        for file_name in os.listdir(self.store_dir):
+            if file_name.endswith('.npz') and file_name not in files:
+                os.remove(os.path.join(self.store_dir, file_name))
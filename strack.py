@@ -3,9 +3,11 @@
 重构后使用模块化设计，主要功能已拆分到各个专门的模块中
 """
 import os
+import argparse
 import logging
 from logging.handlers import TimedRotatingFileHandler
-from stock_processor import StockDataProcessor
+from daily_pipeline import DailyPipeline
+from analysis_pool import ANALYSIS_WORKERS
 from stock_notification import StockNotification
 from config import DEFAULT_EXCEL_FILE
 from email_sender import EmailSender
@@ -51,10 +53,11 @@ logger.addHandler(console_handler)
 # 在代码中使用logger
 logger.info('初始化strack应用')
 
-def main():
+def main(workers=ANALYSIS_WORKERS, export_path=None):
     try:
         current_sheet_name = "pool"
         target_sheet_name = "watch"
+        trend_sheet_name = "trend"
 
         logger.info('开始执行主函数')
         excel_file_name = DEFAULT_EXCEL_FILE
@@ -64,28 +67,20 @@ def main():
         excel_file_name = DEFAULT_EXCEL_FILE
         file_path = os.path.join(os.getcwd(), excel_file_name)
         
-        # 创建股票数据处理器
-        processor = StockDataProcessor(file_path)
+        # 创建每日处理流程
+        pipeline = DailyPipeline(file_path)
         
         logger.info("开始处理股票数据...")
         
-        # # 执行主要处理流程
-        processor.process_stock_data(current_sheet_name=current_sheet_name, target_sheet_name=target_sheet_name)
-        
-        logger.info("开始格式化工作表...")
-        
-        # # 格式化工作表
-        processor.format_worksheet(sheet_name=target_sheet_name)
-        
-        logger.info("开始高亮核心股票...")
-        
-        # 高亮核心股票（将pool工作表中核心列等于1的股票在watch工作表中设为红色）
-        processor.excel_handler.highlight_core_stocks(current_sheet_name, target_sheet_name)
+        # 一次完成 watch 和 trend 工作表，之后格式化 watch 工作表并高亮核心股票
+        # （将pool工作表中核心列等于1的股票在watch工作表中设为红色）
+        pipeline.run(source_sheet_name=current_sheet_name, watch_sheet_name=target_sheet_name,
+                     trend_sheet_name=trend_sheet_name, workers=workers, export_path=export_path)
         
         logger.info("股票数据处理完成！")
 
         # logger.info("开始获取股票通知数据...")
-        # notifier = StockNotification(processor.excel_handler)
+        # notifier = StockNotification(pipeline.excel_handler)
         # stock_notices, focus_names = notifier.get_data()
         
         # logger.info("开始发送股票通知邮件...")
@@ -102,4 +97,8 @@ def main():
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS, help="分析使用的进程数")
+    parser.add_argument("--export", dest="export_path", help="流式导出 watch 和 trend 到指定文件（不修改原工作簿）")
+    args = parser.parse_args()
+    main(workers=args.workers, export_path=args.export_path)
\ No newline at end of file
@@ -20,6 +20,7 @@ import numpy as np
 import pandas as pd
 import tushare as ts
 from datetime import datetime, timedelta
+from indicator_engine import IndicatorPanel
 
 # ====== 配置 ======
 # TUSHARE_TOKEN = ''   # TODO: 改成你的 Tushare Token，或设置环境变量同名
@@ -63,14 +64,9 @@ TOL = 0.008                                 # 接近容差：0.005=0.5%，可改
 
 def add_boll(g: pd.DataFrame, win=BOLL_WIN, k=BOLL_K) -> pd.DataFrame:
     """计算 BOLL(20, k)，附加 MA20/上轨/下轨/%B。"""
-    g = g.copy()
-    g["MA20"]  = g["close"].rolling(win).mean()
-    g["STD20"] = g["close"].rolling(win).std(ddof=0)
-    g["UPPER"] = g["MA20"] + k * g["STD20"]
-    g["LOWER"] = g["MA20"] - k * g["STD20"]
-    # %B (0=下轨, 1=上轨)；仅供参考，不用于“接近”判断（你之前的买点条件可用它）
-    g["percentB"] = (g["close"] - g["LOWER"]) / (g["UPPER"] - g["LOWER"])
-    return g
+    # 与批量计算使用同一个指标面板；%B (0=下轨, 1=上轨) 仅供参考，不用于“接近”判断
+    panel = IndicatorPanel.single(g)
+    return panel.frame(None, g, **panel.boll(win, k))
 
 def pct_near(a: float, b: float, tol: float, num: int) -> bool:
     """
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试数据源路由：出错时切换到备用数据源、出错的数据源暂停使用（冷却）、按延迟选择数据源
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+import pytest
+import data_source
+from data_source import (DataSource, DataSourceRouter, QuotaExceededError, NoDataError,
+                         ERROR_COOLDOWN, QUOTA_COOLDOWN, MAX_COOLDOWN)
+
+
+class Clock:
+    """可控的 time.monotonic"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(data_source.time, 'monotonic', clock)
+    return clock
+
+
+class ScriptedSource(DataSource):
+    """按预设结果依次响应的数据源：每次调用耗时 latency 秒，结果为异常时抛出"""
+
+    def __init__(self, name, clock, latency=1.0, results=(), quota=True):
+        self.name = name
+        self.clock = clock
+        self.latency = latency
+        self.results = list(results)
+        self.quota = quota
+        self.calls = 0
+
+    def get_daily(self, ts_code, start_date, end_date):
+        self.calls += 1
+        self.clock.now += self.latency
+        result = self.results.pop(0) if self.results else "ok"
+        if isinstance(result, Exception):
+            raise result
+        return pd.DataFrame({'ts_code': [ts_code], 'source': [self.name]})
+
+    def has_quota(self):
+        return self.quota
+
+
+def fetch(router):
+    return router.get_daily('600000.SH', '20240101', '20240105')['source'].iloc[0]
+
+
+def test_healthy_primary_never_probes_fallback(clock):
+    """主数据源正常时不调用备用数据源（包括还没有测得延迟的备用数据源）"""
+    primary = ScriptedSource("tushare", clock)
+    fallback = ScriptedSource("akshare", clock)
+    router = DataSourceRouter([primary, fallback])
+    assert [fetch(router) for _ in range(5)] == ["tushare"] * 5
+    assert fallback.calls == 0
+
+
+def test_failover_and_cooldown(clock):
+    """主数据源出错时切换到备用数据源，冷却期内不再尝试，冷却结束后恢复使用延迟更低的主数据源"""
+    primary = ScriptedSource("tushare", clock, latency=1.0, results=["ok", ConnectionError("reset")])
+    fallback = ScriptedSource("akshare", clock, latency=5.0)
+    router = DataSourceRouter([primary, fallback])
+
+    assert fetch(router) == "tushare"
+    assert fetch(router) == "akshare"
+    stats = router.stats()
+    assert stats["tushare"]["failures"] == 1
+    assert stats["tushare"]["cooldown_until"] == pytest.approx(clock.now - 5.0 + ERROR_COOLDOWN)
+
+    assert fetch(router) == "akshare"
+    assert primary.calls == 2
+
+    clock.now += ERROR_COOLDOWN
+    assert fetch(router) == "tushare"
+    assert router.stats()["tushare"]["failures"] == 0
+
+
+def test_cooldown_grows_with_consecutive_failures(clock):
+    """连续出错时冷却时间逐次加长，不超过上限"""
+    primary = ScriptedSource("tushare", clock, latency=0.0, results=[ConnectionError("reset")] * 20)
+    router = DataSourceRouter([primary])
+    for failures in range(1, 13):
+        clock.now = router.stats()["tushare"]["cooldown_until"]
+        with pytest.raises(ConnectionError):
+            fetch(router)
+        stats = router.stats()["tushare"]
+        assert stats["failures"] == failures
+        assert stats["cooldown_until"] - clock.now == min(MAX_COOLDOWN, ERROR_COOLDOWN * failures)
+
+
+def test_quota_exhausted(clock):
+    """额度用尽的数据源排在有额度的之后；调用时报额度用尽按额度冷却时间暂停"""
+    tushare = ScriptedSource("tushare", clock, quota=False)
+    akshare = ScriptedSource("akshare", clock, latency=2.0, results=[QuotaExceededError("limit")])
+    baostock = ScriptedSource("baostock", clock, latency=3.0)
+    router = DataSourceRouter([tushare, akshare, baostock])
+
+    assert fetch(router) == "baostock"
+    assert tushare.calls == 0
+    assert router.stats()["akshare"]["cooldown_until"] == pytest.approx(clock.now - 3.0 + QUOTA_COOLDOWN)
+
+
+def test_lowest_latency_preferred(clock):
+    """都测得延迟后选择平均延迟最低的数据源"""
+    slow = ScriptedSource("tushare", clock, latency=4.0, results=["ok", ConnectionError("reset")])
+    fast = ScriptedSource("akshare", clock, latency=1.0)
+    router = DataSourceRouter([slow, fast])
+    fetch(router)
+    fetch(router)
+    clock.now += MAX_COOLDOWN
+    assert [fetch(router) for _ in range(3)] == ["akshare"] * 3
+
+
+def test_no_data_is_not_a_failure(clock):
+    """所有数据源都无数据时抛出 NoDataError，且不暂停任何数据源"""
+    router = DataSourceRouter([ScriptedSource("tushare", clock, results=[NoDataError("停牌")]),
+                               ScriptedSource("akshare", clock, results=[NoDataError("停牌")])])
+    with pytest.raises(NoDataError):
+        fetch(router)
+    assert all(stats["failures"] == 0 and stats["cooldown_until"] == 0.0 for stats in router.stats().values())
+
+
+def test_all_sources_fail(clock):
+    """所有数据源都出错时抛出最后一个错误"""
+    router = DataSourceRouter([ScriptedSource("tushare", clock, results=[ConnectionError("reset")]),
+                               ScriptedSource("akshare", clock, results=[TimeoutError("timeout")])])
+    with pytest.raises(TimeoutError):
+        fetch(router)
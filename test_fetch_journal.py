@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试下载断点日志：中断后以相同标识重新运行时恢复已完成的股票
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fetch_journal import FetchJournal
+
+RUN_KEY = "20240105:by_stock:incremental"
+
+
+def test_resume_after_interruption(tmp_path):
+    """已完成和失败的记录在重新打开日志后恢复，之后成功的股票从失败中移除"""
+    path = str(tmp_path / 'fetch_journal.jsonl')
+    journal = FetchJournal(RUN_KEY, path)
+    entry = {"plate": "银行", "file": "600000.SH.npz", "rows": 5, "last_date": "20240105"}
+    journal.mark_done("浦发银行", entry)
+    journal.mark_done("平安银行")
+    journal.mark_failed("招商银行", TimeoutError("timeout"))
+    # 模拟中断：不调用 finish
+
+    resumed = FetchJournal(RUN_KEY, path)
+    assert resumed.completed == {"浦发银行": entry, "平安银行": None}
+    assert resumed.is_done("浦发银行") and not resumed.is_done("招商银行")
+    assert resumed.failed == {"招商银行": "timeout"}
+
+    resumed.mark_done("招商银行")
+    assert resumed.finish() == {}
+    assert not os.path.exists(path)
+
+
+def test_truncated_last_line(tmp_path):
+    """中断时写了一半的最后一行被忽略"""
+    path = tmp_path / 'fetch_journal.jsonl'
+    journal = FetchJournal(RUN_KEY, str(path))
+    journal.mark_done("浦发银行")
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"done": "平安')
+
+    resumed = FetchJournal(RUN_KEY, str(path))
+    assert list(resumed.completed) == ["浦发银行"]
+
+
+def test_different_run_starts_over(tmp_path):
+    """标识不同（交易日或下载模式变化）的旧日志不恢复"""
+    path = str(tmp_path / 'fetch_journal.jsonl')
+    FetchJournal(RUN_KEY, path).mark_done("浦发银行")
+
+    journal = FetchJournal("20240108:by_stock:incremental", path)
+    assert journal.completed == {}
+    assert FetchJournal("20240108:by_stock:incremental", path).completed == {}
+
+
+def test_finish_reports_failures(tmp_path):
+    """finish 返回失败汇总并删除日志"""
+    path = str(tmp_path / 'fetch_journal.jsonl')
+    journal = FetchJournal(RUN_KEY, path)
+    journal.mark_failed("浦发银行", "无数据")
+    assert journal.finish() == {"浦发银行": "无数据"}
+    assert not os.path.exists(path)
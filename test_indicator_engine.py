@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试面板指标计算：批量计算的均线、标准差、BOLL、滚动最高值与逐只股票的 pandas rolling 一致
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+import pytest
+from indicator_engine import IndicatorPanel
+from indicator_cache import IndicatorCache
+
+
+def make_frames(lengths=(300, 45, 1, 120), seed=0):
+    """生成长度不同的多只股票行情（含停牌后上市较晚、只有一根K线的股票）"""
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i, n in enumerate(lengths):
+        closes = 10 * np.cumprod(1 + rng.normal(0, 0.02, n))
+        frames[f"股{i}"] = pd.DataFrame({
+            'ts_code': f"60000{i}.SH",
+            'trade_date': [f"2024{d:04d}" for d in range(n)],
+            'close': closes,
+        })
+    return frames
+
+
+@pytest.mark.parametrize("cache", [None, "fresh"])
+@pytest.mark.parametrize("window,min_periods", [(5, None), (10, 1), (20, None), (20, 1)])
+def test_ma_matches_pandas_rolling(window, min_periods, cache):
+    """均线与 pandas rolling().mean() 一致（含窗口不足的开头部分）"""
+    frames = make_frames()
+    panel = IndicatorPanel(frames, cache=IndicatorCache() if cache else None)
+    values = panel.ma(window, min_periods=min_periods)
+    for name, df in frames.items():
+        expected = df['close'].rolling(window, min_periods=window if min_periods is None else min_periods).mean()
+        np.testing.assert_allclose(panel.column(values, name), expected.to_numpy(), rtol=1e-12, equal_nan=True)
+
+
+def test_boll_matches_add_boll_formula():
+    """BOLL 与 add_boll 的计算方式（rolling mean / std(ddof=0)）一致"""
+    frames = make_frames()
+    panel = IndicatorPanel(frames, cache=None)
+    boll = panel.boll(20, 2.0)
+    for name, df in frames.items():
+        ma = df['close'].rolling(20).mean()
+        std = df['close'].rolling(20).std(ddof=0)
+        upper, lower = ma + 2.0 * std, ma - 2.0 * std
+        expected = {"MA20": ma, "STD20": std, "UPPER": upper, "LOWER": lower,
+                    "percentB": (df['close'] - lower) / (upper - lower)}
+        for key, series in expected.items():
+            np.testing.assert_allclose(panel.column(boll[key], name), series.to_numpy(),
+                                       rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=f"{name} {key}")
+
+
+def test_rolling_max_matches_pandas():
+    """阶段高点与 rolling(180, min_periods=1).max() 一致"""
+    frames = make_frames()
+    panel = IndicatorPanel(frames, cache=None)
+    values = panel.rolling_max(180)
+    for name, df in frames.items():
+        expected = df['close'].rolling(180, min_periods=1).max()
+        np.testing.assert_array_equal(panel.column(values, name), expected.to_numpy())
+
+
+def test_single_stock_panel_and_frame():
+    """单只股票的面板与批量面板结果相同，frame 按行附加指标列"""
+    frames = make_frames()
+    batch = IndicatorPanel(frames, cache=None)
+    df = frames["股1"]
+    single = IndicatorPanel.single(df)
+    np.testing.assert_array_equal(single.column(single.ma(5)), batch.column(batch.ma(5), "股1"))
+
+    result = batch.frame("股1", df, MA5=batch.ma(5))
+    assert list(result.columns) == list(df.columns) + ['MA5']
+    assert 'MA5' not in df.columns
+
+
+def test_shared_cache_reuses_and_follows_data_version():
+    """相同数据的第二个面板从共享缓存读取；数据追加一根K线后重新计算"""
+    cache = IndicatorCache()
+    frames = make_frames()
+    first = IndicatorPanel(frames, cache=cache).ma(5)
+    hits = cache.hits
+    second = IndicatorPanel(frames, cache=cache).ma(5)
+    np.testing.assert_array_equal(first, second)
+    assert cache.hits > hits
+
+    grown = dict(frames)
+    df = frames["股0"]
+    grown["股0"] = pd.concat([df, pd.DataFrame({'ts_code': df['ts_code'].iloc[0], 'trade_date': ['20249999'],
+                                                'close': [df['close'].iloc[-1] * 1.5]})], ignore_index=True)
+    panel = IndicatorPanel(grown, cache=cache)
+    expected = grown["股0"]['close'].rolling(5).mean().to_numpy()
+    np.testing.assert_allclose(panel.column(panel.ma(5), "股0"), expected, rtol=1e-12, equal_nan=True)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试区间极值：稀疏表查询与逐区间 numpy 计算一致
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+from range_extrema import SparseTable, RangeExtrema
+
+
+def all_ranges(n):
+    """全部区间 [i, j]（含两端）"""
+    starts, ends = np.triu_indices(n)
+    return starts, ends
+
+
+@pytest.mark.parametrize("values", [
+    np.random.default_rng(0).normal(10, 1, 37),
+    np.round(np.random.default_rng(1).normal(10, 1, 64), 1),   # 大量重复值
+    np.full(9, 3.0),
+    np.array([5.0]),
+])
+@pytest.mark.parametrize("mode", ['min', 'max'])
+def test_sparse_table_matches_brute_force(values, mode):
+    """任意区间的最值及位置与 numpy 一致，相同值取最左边的位置"""
+    table = SparseTable(values, mode)
+    pick = np.argmin if mode == 'min' else np.argmax
+    starts, ends = all_ranges(len(values))
+    expected_pos = np.array([i + pick(values[i:j + 1]) for i, j in zip(starts, ends)])
+
+    assert [table.argquery(int(i), int(j)) for i, j in zip(starts, ends)] == expected_pos.tolist()
+    np.testing.assert_array_equal(table.argquery_many(starts, ends), expected_pos)
+    np.testing.assert_array_equal(table.query_many(starts, ends), values[expected_pos])
+
+
+def test_range_extrema_queries():
+    """RangeExtrema 的区间最低/最高值及位置"""
+    values = np.array([3.0, 1.0, 4.0, 1.0, 5.0, 9.0, 2.0, 6.0])
+    extrema = RangeExtrema(values)
+    assert len(extrema) == 8
+    assert extrema.range_min(0, 7) == 1.0
+    assert extrema.argmin(0, 7) == 1
+    assert extrema.argmin(2, 7) == 3
+    assert extrema.range_max(0, 4) == 5.0
+    assert extrema.argmax(0, 7) == 5
+    assert extrema.range_max(6, 6) == 2.0
+
+
+def old_local_minima(closes, window):
+    """原圆弧底判断中逐位置滑动窗口找低点的写法"""
+    lows = []
+    for i in range(window, len(closes) - window):
+        if closes[i] == closes[i - window:i + window].min():
+            lows.append((i, closes[i]))
+    return lows
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("radius", [1, 5])
+def test_local_minima_matches_sliding_window(seed, radius):
+    """局部低点与原滑动窗口写法一致（含重复值），start/end 只检查最近一段"""
+    rng = np.random.default_rng(seed)
+    closes = np.round(10 * np.cumprod(1 + rng.normal(0, 0.02, 200)), 1)
+    extrema = RangeExtrema(closes)
+
+    assert extrema.local_minima(radius) == old_local_minima(closes, radius)
+    # 最近60个交易日（analyze_stock_status 的用法），位置相对于起点
+    assert extrema.local_minima(radius, start=140) == old_local_minima(closes[140:], radius)
+    assert extrema.local_minima(radius, start=20, end=80) == old_local_minima(closes[20:80], radius)
+
+
+def test_local_minima_too_short():
+    """数据不足两倍窗口时没有低点"""
+    assert RangeExtrema(np.arange(10.0)).local_minima(5) == []
+    assert RangeExtrema(np.arange(10.0)).local_minima(5, start=4) == []
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试 watch 工作表：面板批量计算的指标与逐只股票计算一致，按列组装的结果与原逐只股票补齐的写法一致
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from stock_processor import StockDataProcessor, WATCH_COLUMNS
+
+
+def make_histories(count=6, days=40, seed=0):
+    """生成 (股票名称, 板块, 历史数据) 列表，历史数据按日期降序（与数据存储中一致）"""
+    rng = np.random.default_rng(seed)
+    dates = [f"202401{d:02d}" if d < 32 else f"202402{d - 31:02d}" for d in range(1, days + 1)]
+    histories = []
+    for i in range(count):
+        pct = rng.normal(0, 2, days)
+        closes = 10 * np.cumprod(1 + pct / 100)
+        df = pd.DataFrame({
+            'ts_code': f"60000{i}.SH",
+            'trade_date': dates,
+            'close': closes,
+            'low': closes * (1 - rng.uniform(0, 0.02, days)),
+            'pct_chg': pct,
+        })
+        histories.append((f"股{i}", f"板块{i % 2}", df.iloc[::-1].reset_index(drop=True)))
+    return histories
+
+
+def old_watch_table(rows):
+    """原 process_stock_data 的写法：逐只股票追加到 merged_data，每只股票之后把所有列补齐到相同长度"""
+    merged_data = defaultdict(list)
+    for row in rows:
+        for key in WATCH_COLUMNS:
+            merged_data[key].append(row[key])
+        for date, pct_change in row["涨跌幅"]:
+            merged_data[date].append(pct_change)
+
+        max_len = max(len(v) for v in merged_data.values())
+        for key in merged_data:
+            if len(merged_data[key]) < max_len:
+                merged_data[key].extend([np.nan] * (max_len - len(merged_data[key])))
+    return pd.DataFrame(merged_data)
+
+
+def test_panel_rows_match_per_stock_rows():
+    """批量面板算好指标后的每一行，与逐只股票单独计算（原写法）的结果相同"""
+    histories = make_histories()
+    frames = StockDataProcessor.prepare_watch_frames(histories)
+    for stock_name, plate, history_df in histories:
+        batch = StockDataProcessor._analyze_watch_row(stock_name, plate, frames[stock_name][1])
+        single = StockDataProcessor._analyze_watch_row(stock_name, plate, history_df.head(30).copy())
+        assert batch == single
+
+
+def test_build_watch_table_matches_padding_loop():
+    """所有股票的交易日相同时，按列组装的结果与原补齐写法完全一致（列顺序、类型、数值）"""
+    histories = make_histories()
+    frames = StockDataProcessor.prepare_watch_frames(histories)
+    rows = [StockDataProcessor._analyze_watch_row(name, plate, df) for name, (plate, df) in frames.items()]
+
+    result = StockDataProcessor._build_watch_table(rows)
+    pd.testing.assert_frame_equal(result, old_watch_table(rows))
+    assert list(result.columns[:len(WATCH_COLUMNS)]) == WATCH_COLUMNS
+    assert len(result.columns) == len(WATCH_COLUMNS) + 20
+
+
+def test_build_watch_table_aligns_missing_dates():
+    """股票缺少某个交易日（停牌）时该格为空，其余日期仍在本股票的行上"""
+    histories = make_histories(count=3)
+    frames = StockDataProcessor.prepare_watch_frames(histories)
+    rows = [StockDataProcessor._analyze_watch_row(name, plate, df) for name, (plate, df) in frames.items()]
+    suspended = rows[1]["涨跌幅"][3][0]
+    rows[1]["涨跌幅"] = [item for item in rows[1]["涨跌幅"] if item[0] != suspended]
+    # 最后一只股票多出一个其他股票没有的交易日
+    rows[2]["涨跌幅"] = [("20240301", 1.23)] + rows[2]["涨跌幅"]
+
+    result = StockDataProcessor._build_watch_table(rows)
+    assert np.isnan(result.loc[1, suspended])
+    assert result.loc[0, suspended] == dict(rows[0]["涨跌幅"])[suspended]
+    assert result.loc[2, "20240301"] == 1.23
+    assert result["20240301"].isna().tolist() == [True, True, False]
+    for i, row in enumerate(rows):
+        for date, pct_change in row["涨跌幅"]:
+            assert result.loc[i, date] == pct_change
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试列式数据存储：写入后读回一致、retain 只保留指定股票、首次使用时导入旧版 stocks_data.json
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import numpy as np
+import pandas as pd
+from stock_store import StockDataStore
+
+
+def make_history(code, days=5, start=0):
+    """生成按日期降序的历史数据（与数据源返回的顺序一致）"""
+    dates = [f"202401{d:02d}" for d in range(start + days, start, -1)]
+    return pd.DataFrame({
+        'ts_code': code,
+        'trade_date': dates,
+        'open': np.linspace(10, 11, days),
+        'close': np.linspace(10.5, 11.5, days),
+        'pct_chg': np.linspace(-1, 1, days),
+        'vol': np.arange(days) * 1000.0,
+    })
+
+
+def test_round_trip(tmp_path):
+    """写入后重新打开存储，数据、行顺序、板块、索引信息都不变；可只读部分列"""
+    store = StockDataStore(str(tmp_path / 'stocks_data'))
+    histories = {"浦发银行": make_history("600000.SH"), "平安银行": make_history("000001.SZ", days=3)}
+    for name, df in histories.items():
+        store.write_symbol(name, "银行", df, no_bar_dates=["20240103"] if name == "平安银行" else None)
+    store.save_index()
+
+    reopened = StockDataStore(str(tmp_path / 'stocks_data'))
+    assert reopened.symbols() == list(histories)
+    for name, df in histories.items():
+        pd.testing.assert_frame_equal(reopened.load_history(name), df)
+        assert reopened.get_plate(name) == "银行"
+        assert reopened.index[name]["rows"] == len(df)
+        assert reopened.index[name]["last_date"] == df['trade_date'].max()
+    assert reopened.index["浦发银行"]["file"] == "600000.SH.npz"
+    assert reopened.get_no_bar_dates("平安银行") == ["20240103"]
+    assert reopened.get_no_bar_dates("浦发银行") == []
+
+    partial = reopened.load_history("浦发银行", columns=['trade_date', 'close', 'missing'])
+    assert list(partial.columns) == ['trade_date', 'close']
+    assert [name for name, _, _ in reopened.iter_histories(["平安银行", "不存在"])] == ["平安银行"]
+
+
+def test_overwrite_keeps_file_name(tmp_path):
+    """同一只股票再次写入时覆盖原文件"""
+    store = StockDataStore(str(tmp_path / 'stocks_data'))
+    store.write_symbol("浦发银行", "银行", make_history("600000.SH"))
+    store.write_symbol("浦发银行", "银行", make_history("600000.SH", days=8))
+    store.save_index()
+    assert sorted(os.listdir(tmp_path / 'stocks_data')) == ['600000.SH.npz', 'index.json']
+    assert len(StockDataStore(str(tmp_path / 'stocks_data')).load_history("浦发银行")) == 8
+
+
+def test_retain(tmp_path):
+    """retain 按给定顺序只保留指定股票，落盘时删除其余股票的数据文件"""
+    store_dir = tmp_path / 'stocks_data'
+    store = StockDataStore(str(store_dir))
+    store.save({
+        "甲": {"plate": "A", "history": make_history("600001.SH")},
+        "乙": {"plate": "B", "history": make_history("600002.SH")},
+        "丙": {"plate": "C", "history": make_history("600003.SH")},
+    })
+
+    store.retain(["丙", "甲", "不存在"])
+    assert store.symbols() == ["丙", "甲"]
+    # 落盘前不删除文件
+    assert '600002.SH.npz' in os.listdir(store_dir)
+    store.save_index()
+
+    assert sorted(os.listdir(store_dir)) == ['600001.SH.npz', '600003.SH.npz', 'index.json']
+    reopened = StockDataStore(str(store_dir))
+    assert reopened.symbols() == ["丙", "甲"]
+    pd.testing.assert_frame_equal(reopened.load_history("甲"), make_history("600001.SH"))
+
+
+def test_imports_legacy_json_once(tmp_path):
+    """没有索引时自动导入同级的旧版 stocks_data.json，之后直接读取索引"""
+    legacy = {"浦发银行": {"plate": "银行", "history": make_history("600000.SH").to_dict('records')}}
+    legacy_path = tmp_path / 'stocks_data.json'
+    legacy_path.write_text(json.dumps(legacy, ensure_ascii=False), encoding='utf-8')
+
+    store = StockDataStore(str(tmp_path / 'stocks_data'))
+    assert store.symbols() == ["浦发银行"]
+    pd.testing.assert_frame_equal(store.load_history("浦发银行"), make_history("600000.SH"))
+    assert (tmp_path / 'stocks_data' / 'index.json').exists()
+    assert legacy_path.exists()
+
+    # 旧文件之后的变化不再导入
+    legacy_path.write_text(json.dumps({}), encoding='utf-8')
+    assert StockDataStore(str(tmp_path / 'stocks_data')).symbols() == ["浦发银行"]
+
+
+def test_empty_store(tmp_path):
+    """既没有索引也没有旧版文件时为空存储"""
+    store = StockDataStore(str(tmp_path / 'stocks_data'))
+    assert store.symbols() == []
+    assert store.get_no_bar_dates("浦发银行") == []
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试交易日历：本地缓存每天最多刷新一次，日期查找与逐个比较的结果一致
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+from datetime import datetime
+import pytest
+from trade_calendar import TradeCalendar
+
+DATES = ["20240102", "20240103", "20240104", "20240105", "20240108", "20240109", "20240110"]
+
+
+class CalendarSource:
+    """提供固定交易日历的数据源，记录调用次数"""
+
+    def __init__(self, dates=DATES, error=None):
+        self.dates = list(dates)
+        self.error = error
+        self.calls = 0
+
+    def get_trade_calendar(self):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return list(self.dates)
+
+
+def make_calendar(tmp_path, dates=DATES):
+    return TradeCalendar(str(tmp_path / 'trade_calendar.json'), source=CalendarSource(dates))
+
+
+def test_cache_refreshed_once_per_day(tmp_path):
+    """当天已刷新的缓存直接使用，不再请求数据源"""
+    calendar = make_calendar(tmp_path)
+    assert calendar.dates == DATES
+    assert calendar.source.calls == 1
+
+    again = make_calendar(tmp_path)
+    assert again.dates == DATES
+    assert again.source.calls == 0
+
+
+def test_stale_cache_refreshed_and_used_on_failure(tmp_path):
+    """缓存不是当天的则刷新；刷新失败时使用旧缓存，没有缓存时抛出异常"""
+    path = tmp_path / 'trade_calendar.json'
+    path.write_text(json.dumps({"updated": "20000101", "dates": DATES[:3]}), encoding='utf-8')
+
+    calendar = TradeCalendar(str(path), source=CalendarSource())
+    assert calendar.dates == DATES
+    assert json.loads(path.read_text(encoding='utf-8'))["updated"] == datetime.now().strftime('%Y%m%d')
+
+    path.write_text(json.dumps({"updated": "20000101", "dates": DATES[:3]}), encoding='utf-8')
+    failing = TradeCalendar(str(path), source=CalendarSource(error=ConnectionError("offline")))
+    assert failing.dates == DATES[:3]
+
+    missing = TradeCalendar(str(tmp_path / 'missing.json'), source=CalendarSource(error=ConnectionError("offline")))
+    with pytest.raises(ConnectionError):
+        missing.dates
+
+
+@pytest.mark.parametrize("date", ["20231229", "20240102", "20240106", "20240108", "20240110", "20240131"])
+def test_lookups_match_linear_scan(tmp_path, date):
+    """二分查找的结果与逐个比较一致（含日历两端之外和非交易日）"""
+    calendar = make_calendar(tmp_path)
+    on_or_before = [d for d in DATES if d <= date]
+    after = [d for d in DATES if d > date]
+
+    assert calendar.is_trading_day(date) == (date in DATES)
+    assert calendar.index_on_or_before(date) == len(on_or_before) - 1
+    assert calendar.latest_on_or_before(date) == (on_or_before[-1] if on_or_before else None)
+    assert calendar.next_trading_day(date) == (after[0] if after else None)
+
+
+def test_days_back_and_between(tmp_path):
+    """往前数 n 个交易日（超出起点时取第一天），区间查询含两端"""
+    calendar = make_calendar(tmp_path)
+    assert calendar.days_back(0, "20240108") == "20240108"
+    assert calendar.days_back(2, "20240107") == "20240103"
+    assert calendar.days_back(100, "20240110") == "20240102"
+    assert calendar.between("20240103", "20240108") == ["20240103", "20240104", "20240105", "20240108"]
+    assert calendar.between("20240106", "20240107") == []
@@ -0,0 +1,157 @@
+"""
+交易日历模块
+缓存交易日历到本地文件（每天最多从数据源刷新一次），并提供基于二分查找的日期计算
+"""
+
+import os
+import json
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from data_source import AkShareSource
+
+# 默认缓存文件（相对当前工作目录）
+CALENDAR_FILE = 'trade_calendar.json'
+
+
+class TradeCalendar:
+    """交易日历，日期格式统一为 YYYYMMDD 字符串"""
+
+    def __init__(self, cache_path=CALENDAR_FILE, source=None):
+        """
+        初始化交易日历
+
+        Args:
+            cache_path: 缓存文件路径
+            source: 提供交易日历的数据源，默认为 AkShare
+        """
+        self.cache_path = cache_path
+        self.source = source if source is not None else AkShareSource()
+        self._dates = None
+
+    @property
+    def dates(self):
+        """
+        全部交易日（升序）
+        """
+        if self._dates is None:
+            self._dates = self._load()
+        return self._dates
+
+    def _load(self):
+        """
+        读取交易日历，缓存不是当天更新的则从数据源刷新，刷新失败时使用旧缓存
+        """
+        today = datetime.now().strftime('%Y%m%d')
+        cache = None
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if cache.get("updated") == today:
+                return cache["dates"]
+
+        try:
+            dates = self.refresh()
+        except Exception as e:
+            if cache is None:
+                raise
+            print(f"刷新交易日历失败，使用 {cache.get('updated')} 的缓存: {e}")
+            return cache["dates"]
+        return dates
+
+    def refresh(self):
+        """
+        从数据源获取交易日历并写入缓存
+
+        Returns:
+            list: 全部交易日（升序）
+        """
+        print("获取股票交易日期")
+        dates = self.source.get_trade_calendar()
+
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"updated": datetime.now().strftime('%Y%m%d'), "dates": dates}, f)
+        os.replace(tmp_path, self.cache_path)
+
+        self._dates = dates
+        return dates
+
+    def is_trading_day(self, date):
+        """
+        判断是否为交易日
+
+        Args:
+            date: 日期，格式 YYYYMMDD
+
+        Returns:
+            bool: 是否为交易日
+        """
+        idx = bisect_left(self.dates, date)
+        return idx < len(self.dates) and self.dates[idx] == date
+
+    def index_on_or_before(self, date=None):
+        """
+        获取不晚于指定日期的最近交易日在日历中的位置
+
+        Args:
+            date: 日期，格式 YYYYMMDD，默认为今天
+
+        Returns:
+            int: 日历位置，日期早于日历起点时返回 -1
+        """
+        if date is None:
+            date = datetime.now().strftime('%Y%m%d')
+        return bisect_right(self.dates, date) - 1
+
+    def latest_on_or_before(self, date=None):
+        """
+        获取不晚于指定日期的最近交易日
+
+        Args:
+            date: 日期，格式 YYYYMMDD，默认为今天
+
+        Returns:
+            str: 交易日，不存在时返回 None
+        """
+        idx = self.index_on_or_before(date)
+        return self.dates[idx] if idx >= 0 else None
+
+    def next_trading_day(self, date):
+        """
+        获取指定日期之后的第一个交易日
+
+        Args:
+            date: 日期，格式 YYYYMMDD
+
+        Returns:
+            str: 交易日，不存在时返回 None
+        """
+        idx = bisect_right(self.dates, date)
+        return self.dates[idx] if idx < len(self.dates) else None
+
+    def days_back(self, n, date=None):
+        """
+        获取从指定日期（不晚于该日期的最近交易日）往前数 n 个交易日的日期
+
+        Args:
+            n: 往前的交易日数
+            date: 日期，格式 YYYYMMDD，默认为今天
+
+        Returns:
+            str: 交易日（超出日历起点时返回日历第一天）
+        """
+        idx = self.index_on_or_before(date)
+        return self.dates[max(0, idx - n)]
+
+    def between(self, start_date, end_date):
+        """
+        获取两个日期之间（含两端）的交易日
+
+        Args:
+            start_date: 开始日期，格式 YYYYMMDD
+            end_date: 结束日期，格式 YYYYMMDD
+
+        Returns:
+            list: 交易日列表（升序）
+        """
+        return self.dates[bisect_left(self.dates, start_date):bisect_right(self.dates, end_date)]
@@ -1,11 +1,30 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
-from stock_data import StockDataFetcher
+from stock_data import StockDataFetcher, FETCH_WORKERS
 from excel_handler import ExcelHandler
-from config import API_LIMIT_COUNT, API_SLEEP_TIME
-import json
-import sys
-import time
+from stock_store import StockDataStore
+from fetch_journal import FetchJournal
+from indicator_engine import IndicatorPanel
+from rolling_state import IndicatorStateBook
+from range_extrema import RangeExtrema
+from score_params import (HIGH_LOOKBACK, DIVERGENCE_LAG, DIVERGENCE_STRONG, DIVERGENCE_MEDIUM, CLOSE_STRENGTH_RATIO,
+                          RECENT_DAYS, V_REBOUND_DAYS, V_REBOUND_PCT, W_LOW_DIFF, ARC_WINDOW, ARC_MIN_SPAN,
+                          SCORE_LEVELS, LOWEST_LEVEL, current_score_params)
+from analysis_pool import run_per_stock, ANALYSIS_WORKERS
+import argparse
+
+# 技术分析使用的行情列
+TREND_HISTORY_COLUMNS = ['trade_date', 'close']
+
+# 得分状态对应的操作建议
+SCORE_ADVICE = {
+    '【极强多头】': "符合核心选股标准，可重点跟踪布局",
+    '【中度多头】': "趋势明确但强度一般，需等待回调确认支撑",
+    '【震荡整理】': "多空力量均衡，无明确趋势，建议观望",
+    '【中度空头】': "空头占优，避免主动买入",
+    LOWEST_LEVEL: "趋势走弱，需规避风险",
+}
 
 class StockDataManager:
     """股票数据管理器"""
@@ -14,18 +33,20 @@ class StockDataManager:
         """初始化数据管理器"""
         self.data_fetcher = StockDataFetcher()
         self.excel_handler = ExcelHandler(file_path)
+        self.data_store = StockDataStore()
     
-    def read_data_from_sheet(self, sheet_name):
+    def read_data_from_sheet(self, sheet_name, columns=None):
         """
         从工作表读取数据
         
         Args:
             sheet_name: 工作表名称
+            columns: 只读取这些列，None 表示全部列
             
         Returns:
             DataFrame: 读取的数据
         """
-        return self.excel_handler.read_data_from_sheet(sheet_name)
+        return self.excel_handler.read_data_from_sheet(sheet_name, columns)
 
     def get_stock_date(self):
         """
@@ -36,88 +57,332 @@ class StockDataManager:
         """
         return self.data_fetcher.get_stock_date(start=0, end=179)
 
-    def process_stock_data_to_json(self, sheet_name="pool"):
+    def get_trade_dates(self):
+        """
+        获取交易日期列表
+        
+        Returns:
+            list: 最近180个交易日（升序）
+        """
+        return self.data_fetcher.get_trade_dates(start=0, end=179)
+
+    def process_stock_data_to_json(self, sheet_name="pool", by_date=False, full_refresh=False, workers=FETCH_WORKERS):
         """
-        处理股票数据并保存为JSON格式
+        获取股票池历史数据并保存到列式数据存储
+        默认增量更新：只下载最后一个已保存交易日之后的数据，
+        新加入股票池或数据有缺口的股票才重新下载完整区间，
+        数据源确认无行情的交易日（停牌等）记录在数据存储索引中，不视为缺口；
+        每只股票下载完成即写入数据存储并记录到下载日志，中断后重新运行从断点继续；
+        同时维护各股票的滚动均线状态，增量更新时只追加新K线，趋势评分直接使用
         
         Args:
-            current_sheet_name: 当前工作表名称
+            sheet_name: 股票池所在的工作表名称
+            by_date: 是否使用截面模式（按交易日获取全市场数据），调用次数与股票池大小无关
+            full_refresh: 是否忽略已保存数据，全部重新下载
+            workers: 逐只获取时的并发线程数
         """
         source_data = self.read_data_from_sheet(sheet_name)
         if source_data is None:
             print("无法读取源数据，处理中止")
             return
         
-        start_date, current_date = self.get_stock_date()
-        print(f"交易日期范围: {start_date} 到 {current_date}")
+        trade_dates = self.get_trade_dates()
+        print(f"交易日期范围: {trade_dates[0]} 到 {trade_dates[-1]}")
         
-        count = 0
+        mode = "by_date" if by_date else "by_stock"
+        journal = FetchJournal(run_key=f"{trade_dates[-1]}:{mode}:{'full' if full_refresh else 'incremental'}")
         
-        all_data = {}
-        for index, row in source_data.iterrows():
-            # API调用频率控制
-            if count >= API_LIMIT_COUNT:
-                print(f"已处理 {count} 只股票，等待 {API_SLEEP_TIME} 秒...")
-                time.sleep(API_SLEEP_TIME)
-                count = 0
+        # 恢复上次中断前已完成的股票
+        for stock_name, entry in journal.completed.items():
+            if entry is not None:
+                self.data_store.index[stock_name] = entry
+        
+        fetch_plan = self._plan_fetch(source_data, trade_dates, full_refresh)
+        fetch_plan = {name: date for name, date in fetch_plan.items() if not journal.is_done(name)}
+        print(f"需要更新 {len(fetch_plan)} 只股票，已是最新 {len(source_data) - len(fetch_plan)} 只")
+        
+        plates = dict(zip(source_data["名称"], source_data["板块"]))
+        state_book = IndicatorStateBook(self.data_store.store_dir)
+        
+        def save_fetched(stock_name, history_df):
+            # 逐只写入磁盘后即释放，内存占用与股票池大小无关
+            stored_df = None
+            stored_last_date = None
+            no_bar_dates = self._confirm_no_bar_dates(fetch_plan[stock_name], history_df)
+            if fetch_plan[stock_name] > trade_dates[0] and stock_name in self.data_store.index:
+                stored_df = self.data_store.load_history(stock_name)
+                stored_last_date = self.data_store.index[stock_name].get("last_date")
+                no_bar_dates += self.data_store.get_no_bar_dates(stock_name)
+            merged_df = self._merge_history(stored_df, history_df, trade_dates[0])
+            no_bar_dates = [d for d in set(no_bar_dates) if d >= trade_dates[0]]
+            self.data_store.write_symbol(stock_name, plates[stock_name], merged_df, no_bar_dates)
+            journal.mark_done(stock_name, self.data_store.index[stock_name])
             
-            count += 1
-            print(f"============================{count}============================")
+            # 增量数据只追加新K线，其余情况重建滚动均线状态
+            if stored_df is None or not state_book.apply(stock_name, history_df, stored_last_date):
+                state_book.rebuild(stock_name, merged_df)
+        
+        def keep_stored(stock_name):
+            # 增量区间内数据源还没有新K线（如最新交易日尚未出数据）时已保存数据就是最新的，不算下载失败
+            if fetch_plan[stock_name] <= trade_dates[0] or stock_name not in self.data_store.index:
+                return False
+            journal.mark_done(stock_name, self.data_store.index[stock_name])
+            return True
+        
+        if by_date:
+            errors = self._fetch_pool_by_date(source_data, fetch_plan, trade_dates, save_fetched, keep_stored)
+        else:
+            errors = self._fetch_pool_by_stock(source_data, fetch_plan, trade_dates[-1], save_fetched,
+                                               keep_stored, workers=workers)
+        
+        for stock_name, error in errors.items():
+            journal.mark_failed(stock_name, error)
+        
+        # 无需更新（或下载失败时保留已有数据）的股票仅同步板块信息
+        for stock_name, stock_plate in plates.items():
+            if stock_name in self.data_store.index:
+                self.data_store.index[stock_name]["plate"] = stock_plate
+        
+        self.data_store.retain(source_data["名称"].tolist())
+        self.data_store.save_index()
+        print(f"股票数据已保存，共 {len(self.data_store.symbols())} 只股票")
+        
+        # 状态缺失或与已保存数据不一致（如上次运行中断）的股票重建滚动均线状态
+        for stock_name, entry in self.data_store.index.items():
+            if state_book.get(stock_name, entry.get("last_date")) is None:
+                state_book.rebuild(stock_name, self.data_store.load_history(stock_name, columns=["trade_date", "close"]))
+        state_book.retain(self.data_store.symbols())
+        state_book.save()
+        
+        return journal.finish()
+
+    def _plan_fetch(self, source_data, trade_dates, full_refresh=False):
+        """
+        根据已保存数据确定每只股票需要下载的起始日期
+        
+        Args:
+            source_data: 股票池数据
+            trade_dates: 交易日期列表（升序）
+            full_refresh: 是否全部重新下载
             
-            # 获取股票基本信息
-            stock_code = row["代码"]   
-            stock_name = row["名称"]   
-            stock_plate = row["板块"]  
+        Returns:
+            dict: 下载计划 {股票名称: 起始日期}
+        """
+        window_start = trade_dates[0]
+        latest_date = trade_dates[-1]
+        calendar = self.data_fetcher.trade_calendar
+        
+        fetch_plan = {}
+        for index, row in source_data.iterrows():
+            stock_name = row["名称"]
+            
+            if full_refresh or stock_name not in self.data_store.index:
+                fetch_plan[stock_name] = window_start
+                continue
             
-            print(f"处理股票: {stock_code} - {stock_name} ({stock_plate})")
+            last_date = self.data_store.index[stock_name].get("last_date")
+            if not last_date or last_date < window_start:
+                # 无已保存数据，或已保存数据全部在窗口之外
+                fetch_plan[stock_name] = window_start
+                continue
             
-            # 获取股票历史数据
-            try:
-                history_df = self.data_fetcher.get_stock_history2(stock_code, start_date, current_date)
-                records = {
-                    stock_name: {
-                        "plate": stock_plate,
-                        "history": history_df.to_dict(orient='records')
-                    }
-                }
-                all_data.update(records)
-            except Exception as e:
-                print(f"获取股票 {stock_code} 历史数据失败: {e}")
+            # 检查已保存区间内是否有缺失的交易日（只读取交易日期列），
+            # 数据源已确认无行情的交易日（停牌等）不算缺口
+            history_df = self.data_store.load_history(stock_name, columns=["trade_date"])
+            stored_dates = set(history_df["trade_date"])
+            stored_dates.update(self.data_store.get_no_bar_dates(stock_name))
+            first_date = max(min(stored_dates), window_start)
+            expected = calendar.between(first_date, last_date)
+            if any(d not in stored_dates for d in expected):
+                print(f"股票 {stock_name} 数据存在缺口，重新下载")
+                fetch_plan[stock_name] = window_start
                 continue
+            
+            if last_date < latest_date:
+                fetch_plan[stock_name] = calendar.next_trading_day(last_date)
         
-        with open('stocks_data.json', 'w', encoding='utf-8') as f:
-            json.dump(all_data, f, ensure_ascii=False, indent=4)
+        return fetch_plan
 
-    def extract_features(self, target_sheet_name="trend"):
+    def _confirm_no_bar_dates(self, start_date, history_df):
         """
-        从JSON数据中提取特征并进行股票技术分析
+        找出下载区间内数据源未返回行情的交易日（停牌等）
+        只统计最后一条行情之前的交易日，最新交易日尚未出数据时下次仍会增量下载
         
+        Args:
+            start_date: 下载起始日期
+            history_df: 新下载的历史数据
+            
         Returns:
-            DataFrame: 包含技术分析结果的数据
+            list: 无行情的交易日列表
+        """
+        if history_df is None or history_df.empty:
+            return []
+        
+        fetched_dates = set(history_df["trade_date"])
+        requested = self.data_fetcher.trade_calendar.between(start_date, max(fetched_dates))
+        return [d for d in requested if d not in fetched_dates]
+
+    def _merge_history(self, stored_df, new_df, window_start):
+        """
+        合并已保存数据和新下载数据，并裁剪到交易日期窗口
+        
+        Args:
+            stored_df: 已保存的历史数据（可为None）
+            new_df: 新下载的历史数据
+            window_start: 窗口起始日期
+            
+        Returns:
+            DataFrame: 按交易日期降序排列的历史数据
+        """
+        if stored_df is None or stored_df.empty:
+            merged_df = new_df
+        else:
+            merged_df = pd.concat([new_df, stored_df], ignore_index=True)
+            merged_df = merged_df.drop_duplicates(subset="trade_date", keep="first")
+        
+        merged_df = merged_df[merged_df["trade_date"] >= window_start]
+        return merged_df.sort_values("trade_date", ascending=False).reset_index(drop=True)
+
+    def _fetch_pool_by_stock(self, source_data, fetch_plan, end_date, on_fetched, on_no_data, workers=FETCH_WORKERS):
+        """
+        逐只股票获取历史数据（多线程并发，共享接口额度）
+        
+        Args:
+            source_data: 股票池数据
+            fetch_plan: 下载计划 {股票名称: 起始日期}
+            end_date: 结束日期
+            on_fetched: 每只股票获取成功后的回调 on_fetched(股票名称, DataFrame)
+            on_no_data: 区间内无数据时的回调 on_no_data(股票名称)，返回 True 表示已是最新（不计为失败）
+            workers: 并发线程数
+            
+        Returns:
+            dict: 失败的股票 {股票名称: 错误信息}
         """
-        # 读取 Excel 中的目标工作表数据
-        with open('stocks_data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        analysis_results = []
-        for stock_name, stock_data in data.items():
-            plate = stock_data["plate"]
-            history = stock_data["history"]
+        plan_data = source_data[source_data["名称"].isin(fetch_plan)]
+        code_to_name = dict(zip(plan_data["代码"], plan_data["名称"]))
+        start_dates = {stock_code: fetch_plan[stock_name] for stock_code, stock_name in code_to_name.items()}
+        
+        # API调用频率由 StockDataFetcher 的限流器控制
+        histories, errors = self.data_fetcher.fetch_histories(
+            list(code_to_name), start_dates, end_date, workers=workers,
+            on_complete=lambda stock_code, history_df: on_fetched(code_to_name[stock_code], history_df),
+            on_no_data=lambda stock_code: on_no_data(code_to_name[stock_code])
+        )
+        
+        return {code_to_name[stock_code]: error for stock_code, error in errors.items()}
+
+    def _fetch_pool_by_date(self, source_data, fetch_plan, trade_dates, on_fetched, on_no_data):
+        """
+        截面模式：按交易日获取全市场数据，再拆分为股票池中各股票的历史数据
+        只下载下载计划中最早起始日期之后的交易日
+        
+        Args:
+            source_data: 股票池数据
+            fetch_plan: 下载计划 {股票名称: 起始日期}
+            trade_dates: 交易日期列表（升序）
+            on_fetched: 每只股票获取成功后的回调 on_fetched(股票名称, DataFrame)
+            on_no_data: 区间内无数据时的回调 on_no_data(股票名称)，返回 True 表示已是最新（不计为失败）
+            
+        Returns:
+            dict: 失败的股票 {股票名称: 错误信息}
+        """
+        if not fetch_plan:
+            return {}
+        
+        plan_data = source_data[source_data["名称"].isin(fetch_plan)]
+        fetch_dates = [d for d in trade_dates if d >= min(fetch_plan.values())]
+        
+        histories = self.data_fetcher.get_stock_histories_by_date(plan_data["代码"].tolist(), fetch_dates)
+        
+        errors = {}
+        for index, row in plan_data.iterrows():
+            stock_code = row["代码"]
+            stock_name = row["名称"]
+            
+            history_df = histories.get(stock_code)
+            if history_df is not None:
+                history_df = history_df[history_df["trade_date"] >= fetch_plan[stock_name]]
+            if history_df is None or history_df.empty:
+                if on_no_data(stock_name):
+                    print(f"股票 {stock_code} 区间内暂无新数据，保留已有数据")
+                    continue
+                print(f"获取股票 {stock_code} 历史数据失败: 截面数据中无该股票")
+                errors[stock_name] = "截面数据中无该股票"
+                continue
+            
+            on_fetched(stock_name, history_df)
+        
+        return errors
 
-            if len(history) < 60:  # 需要至少60天数据进行分析
+    @staticmethod
+    def prepare_trend_frames(histories, states=None):
+        """
+        准备技术分析数据：按日期升序排列，一次性计算所有股票的均线和180日高点
+        滚动均线状态与数据存储一致的股票直接使用状态中的均线，不再计算均线列
+        
+        Args:
+            histories: 可迭代的 (股票名称, 板块, 历史数据)
+            states: 滚动均线状态（IndicatorStateBook），None 表示全部由指标面板计算
+            
+        Returns:
+            dict: {股票名称: (板块, 附加了指标列的历史数据, 均线快照或 None)}，数据不足60天的股票不在其中
+        """
+        frames = {}
+        plates = {}
+        snapshots = {}
+        for stock_name, plate, df in histories:
+            if len(df) < 60:  # 需要至少60天数据进行分析
                 print(f"股票 {stock_name} 数据不足，跳过分析")
                 continue
 
-            # 转换为DataFrame（使用历史数据）
-            df = pd.DataFrame(history)
+            if states is not None:
+                state = states.get(stock_name, df['trade_date'].max())
+                snapshot = state.snapshot() if state is not None else None
+                if snapshot is not None:
+                    snapshots[stock_name] = snapshot
+
+            df = df[TREND_HISTORY_COLUMNS].copy()
+            df['trade_date'] = pd.to_datetime(df['trade_date'])
+            df = df.sort_values('trade_date', ascending=True)
 
-            if 'trade_date' in df.columns:
-                df['trade_date'] = pd.to_datetime(df['trade_date'])
-                df = df.sort_values('trade_date', ascending=True)
+            frames[stock_name] = df
+            plates[stock_name] = plate
 
-            # 进行技术分析
-            result = self.analyze_stock_status(df, stock_name, plate)
-            analysis_results.append(result)
+        # 一次性计算所有股票的180日高点，以及没有可用均线状态的股票的均线
+        panel = IndicatorPanel(frames)
+        high_180 = panel.rolling_max(HIGH_LOOKBACK)
+        ma_panel = IndicatorPanel({stock_name: df for stock_name, df in frames.items() if stock_name not in snapshots})
+        ma = {
+            "MA5": ma_panel.ma(5, min_periods=1),
+            "MA10": ma_panel.ma(10, min_periods=1),
+            "MA20": ma_panel.ma(20, min_periods=1)
+        }
+
+        trend_frames = {}
+        for stock_name, df in frames.items():
+            df = panel.frame(stock_name, df, HIGH180=high_180)
+            if stock_name not in snapshots:
+                df = ma_panel.frame(stock_name, df, **ma)
+            trend_frames[stock_name] = (plates[stock_name], df, snapshots.get(stock_name))
+        return trend_frames
+
+    def extract_features(self, target_sheet_name="trend", workers=ANALYSIS_WORKERS):
+        """
+        从数据存储中提取特征并进行股票技术分析
+        
+        Args:
+            target_sheet_name: 目标工作表名称
+            workers: 分析使用的进程数，1 表示顺序执行
+        
+        Returns:
+            DataFrame: 包含技术分析结果的数据
+        """
+        states = IndicatorStateBook(self.data_store.store_dir)
+        frames = self.prepare_trend_frames(self.data_store.iter_histories(columns=TREND_HISTORY_COLUMNS), states)
+
+        # 进行技术分析（可分给多个进程），结果按股票顺序返回
+        items = [(stock_name, (df, stock_name, plate, snapshot)) for stock_name, (plate, df, snapshot) in frames.items()]
+        analysis_results = [result for _, result in run_per_stock(StockDataManager.analyze_stock_status, items, workers)]
 
         analysis_df = pd.DataFrame(analysis_results)
 
@@ -129,7 +394,8 @@ class StockDataManager:
         
         return analysis_df
     
-    def analyze_stock_status(self, df, symbol_name="未知股票", plate="未知板块"):
+    @staticmethod
+    def analyze_stock_status(df, symbol_name="未知股票", plate="未知板块", ma_snapshot=None, score_params=None):
         """
         优化后股票状态得分评价体系（不含量能维度）
         总分范围：0-100 分（分值越高，多头趋势越强）
@@ -139,12 +405,17 @@ class StockDataManager:
         Args:
             df: 包含 'date', 'close' 的 DataFrame，建议至少包含 180 天以上数据
             symbol_name: 股票名称
+            plate: 板块名称
+            ma_snapshot: 滚动均线状态的快照 {"MA5": (最新, 10根K线之前), ...}，None 表示使用（或计算）df 中的均线列
+            score_params: 得分参数（见 score_params.DEFAULT_SCORE_PARAMS），None 表示使用 score_params.json 或默认值
             
         Returns:
             dict: 包含分析结果的字典
         """
+        params = score_params if score_params is not None else current_score_params()
+        
         # 检查数据是否足够（至少需要60个交易日数据）
-        if len(df) < 60:
+        if len(df) < RECENT_DAYS:
             return {
                 "板块": plate,
                 "股票名": symbol_name,
@@ -154,17 +425,26 @@ class StockDataManager:
                 "操作建议": "请获取更多历史数据"
             }
         
-        # 计算所需的均线
-        df['MA5'] = df['close'].rolling(window=5, min_periods=1).mean()
-        df['MA10'] = df['close'].rolling(window=10, min_periods=1).mean()
-        df['MA20'] = df['close'].rolling(window=20, min_periods=1).mean()
+        # 计算所需的均线（已由指标面板计算或有滚动均线状态时直接使用）
+        if ma_snapshot is None and not {'MA5', 'MA10', 'MA20'}.issubset(df.columns):
+            panel = IndicatorPanel.single(df)
+            df['MA5'] = panel.column(panel.ma(5, min_periods=1))
+            df['MA10'] = panel.column(panel.ma(10, min_periods=1))
+            df['MA20'] = panel.column(panel.ma(20, min_periods=1))
+        
+        # 收盘价区间极值（阶段高点、底部低点都从这里查询）
+        extrema = RangeExtrema(df['close'].to_numpy(dtype=float))
+        n = len(extrema)
         
         # 获取最新数据
         latest = df.iloc[-1]
         close = latest['close']
-        ma5 = latest['MA5']
-        ma10 = latest['MA10']
-        ma20 = latest['MA20']
+        if ma_snapshot is not None:
+            ma5, ma10, ma20 = (ma_snapshot[name][0] for name in ('MA5', 'MA10', 'MA20'))
+        else:
+            ma5 = latest['MA5']
+            ma10 = latest['MA10']
+            ma20 = latest['MA20']
         
         total_score = 0
         reasons = []
@@ -172,11 +452,14 @@ class StockDataManager:
         # --- 1. 阶段新高评分（25分） ---
         stage_high_score = 0
         # 获取过去180个交易日的最高价（如果数据不足180天则使用所有数据）
-        lookback_period = min(180, len(df))
-        high_180 = df['close'].tail(lookback_period).max()
+        if 'HIGH180' in df.columns:
+            high_180 = df['HIGH180'].iloc[-1]
+        else:
+            lookback_period = min(HIGH_LOOKBACK, n)
+            high_180 = extrema.range_max(n - lookback_period, n - 1)
         
         # 完美新高或接近新高直接返回，不计算其他维度
-        if abs(close - high_180) / high_180 <= 0.005:  # 完美新高（允许0.5%误差）
+        if abs(close - high_180) / high_180 <= params['perfect_high_tol']:  # 完美新高（默认允许0.5%误差）
             stage_high_score = 25  # 保持原始维度得分
             reasons.append("阶段新高：完美新高（180日）")
             total_score = 100  # 完美新高给予最高分
@@ -193,7 +476,7 @@ class StockDataManager:
                 "均线结构得分": 0,
                 "底部形态得分": 0
             }
-        elif close >= high_180 * 0.95:  # 接近新高（≥95%）
+        elif close >= high_180 * params['near_high_ratio']:  # 接近新高（默认≥95%）
             stage_high_score = 12  # 保持原始维度得分
             reasons.append("阶段新高：接近新高（180日）")
             total_score = 80  # 接近新高给予次高分
@@ -227,7 +510,8 @@ class StockDataManager:
             ma_basic_score = 25
             is_strong_bull = True
             reasons.append("均线结构：强势多头排列")
-        elif abs(ma5 - ma10) / ma10 < 0.01 and abs(ma10 - ma20) / ma20 < 0.01 and abs(ma5 - ma20) / ma20 < 0.01:
+        elif (abs(ma5 - ma10) / ma10 < params['ma_entangle'] and abs(ma10 - ma20) / ma20 < params['ma_entangle']
+              and abs(ma5 - ma20) / ma20 < params['ma_entangle']):
             ma_basic_score = 10
             reasons.append("均线结构：中性缠绕")
         elif ma20 > ma10 > ma5:
@@ -243,9 +527,12 @@ class StockDataManager:
             divergence_score = 0
             if len(df) >= 30:  # 需要至少30天数据计算10天前的均线
                 # 计算10天前的均线值
-                ma5_10d_ago = df.iloc[-11]['MA5']
-                ma10_10d_ago = df.iloc[-11]['MA10']
-                ma20_10d_ago = df.iloc[-11]['MA20']
+                if ma_snapshot is not None:
+                    ma5_10d_ago, ma10_10d_ago, ma20_10d_ago = (ma_snapshot[name][1] for name in ('MA5', 'MA10', 'MA20'))
+                else:
+                    ma5_10d_ago = df.iloc[-DIVERGENCE_LAG - 1]['MA5']
+                    ma10_10d_ago = df.iloc[-DIVERGENCE_LAG - 1]['MA10']
+                    ma20_10d_ago = df.iloc[-DIVERGENCE_LAG - 1]['MA20']
                 
                 # 计算斜率
                 slope_ma5 = (ma5 - ma5_10d_ago) / ma5_10d_ago if ma5_10d_ago != 0 else 0
@@ -254,10 +541,10 @@ class StockDataManager:
                 
                 if slope_ma5 > slope_ma10 > slope_ma20 > 0:
                     slope_diff = slope_ma5 - slope_ma20
-                    if slope_diff >= 0.01:
+                    if slope_diff >= DIVERGENCE_STRONG:
                         divergence_score = 12
                         reasons.append("均线强度：多头发散度强")
-                    elif slope_diff >= 0.005:
+                    elif slope_diff >= DIVERGENCE_MEDIUM:
                         divergence_score = 6
                         reasons.append("均线强度：多头发散度中等")
                     else:
@@ -266,11 +553,11 @@ class StockDataManager:
             
             # 收盘价站均线强度（0-8分）
             close_strength_score = 0
-            if close > ma5 * 1.03:
+            if close > ma5 * CLOSE_STRENGTH_RATIO:
                 close_strength_score += 3
-            if close > ma10 * 1.03:
+            if close > ma10 * CLOSE_STRENGTH_RATIO:
                 close_strength_score += 3
-            if close > ma20 * 1.03:
+            if close > ma20 * CLOSE_STRENGTH_RATIO:
                 close_strength_score += 2
             
             if close_strength_score > 0:
@@ -286,81 +573,67 @@ class StockDataManager:
         # --- 3. 底部形态评分（30分，可叠加） ---
         bottom_pattern_score = 0
         
-        # 获取最近60个交易日的数据
-        recent_df = df.tail(60).copy()
-        recent_df.reset_index(drop=True, inplace=True)
+        # 最近60个交易日：在完整序列中的起点 base，以下位置均相对 base
+        recent_len = min(RECENT_DAYS, n)
+        base = n - recent_len
         
         # V型底（10分）：存在1个明显低点，低点后收盘价反弹幅度≥5%，且反弹时间≤10个交易日
         v_bottom_score = 0
-        if len(recent_df) >= 20:  # 需要足够数据判断V型底
+        if recent_len >= 20:  # 需要足够数据判断V型底
             # 找出最近60天的最低价
-            min_idx = recent_df['close'].idxmin()
-            min_price = recent_df['close'].min()
+            min_idx = extrema.argmin(base, n - 1) - base
+            min_price = extrema.values[base + min_idx]
             
             # 检查低点后10个交易日内是否有≥5%的反弹
-            if min_idx < len(recent_df) - 1:  # 确保低点不是最后一天
-                days_after_low = len(recent_df) - 1 - min_idx
-                if days_after_low <= 10:  # 反弹时间≤10个交易日
-                    max_after_low = recent_df.iloc[min_idx:]['close'].max()
+            if min_idx < recent_len - 1:  # 确保低点不是最后一天
+                days_after_low = recent_len - 1 - min_idx
+                if days_after_low <= V_REBOUND_DAYS:  # 反弹时间≤10个交易日
+                    max_after_low = extrema.range_max(base + min_idx, n - 1)
                     rebound_pct = (max_after_low - min_price) / min_price
-                    if rebound_pct >= 0.05:  # 反弹幅度≥5%
+                    if rebound_pct >= V_REBOUND_PCT:  # 反弹幅度≥5%
                         v_bottom_score = 10
                         reasons.append("底部形态：V型底")
         
         # W底（10分）：存在2个明显低点，两点收盘价差值＜2%；第二个低点＞第一个低点；第二个低点后收盘价突破两低点之间的高点
         w_bottom_score = 0
-        if len(recent_df) >= 30:  # 需要足够数据判断W型底
+        if recent_len >= 30:  # 需要足够数据判断W型底
             # 找出前半段和后半段的低点
-            mid_idx = len(recent_df) // 2
-            first_half = recent_df.iloc[:mid_idx]['close']
-            second_half = recent_df.iloc[mid_idx:]['close']
+            mid_idx = recent_len // 2
             
-            if not first_half.empty and not second_half.empty:
-                # 直接使用位置索引
-                first_half_min_pos = first_half.argmin()
-                second_half_min_pos = second_half.argmin()
-                
-                # 转换为在recent_df中的绝对位置
-                first_low_pos = first_half_min_pos
-                second_low_pos = mid_idx + second_half_min_pos
+            if mid_idx > 0:
+                # 前半段 [0, mid_idx)、后半段 [mid_idx, recent_len) 的低点位置
+                first_low_pos = extrema.argmin(base, base + mid_idx - 1) - base
+                second_low_pos = extrema.argmin(base + mid_idx, n - 1) - base
                 
-                first_low = recent_df.iloc[first_low_pos]['close']
-                second_low = recent_df.iloc[second_low_pos]['close']
+                first_low = extrema.values[base + first_low_pos]
+                second_low = extrema.values[base + second_low_pos]
                 
                 # 检查两个低点的条件
-                if abs(first_low - second_low) / first_low < 0.02 and second_low > first_low:
+                if abs(first_low - second_low) / first_low < W_LOW_DIFF and second_low > first_low:
                     # 找出两低点之间的高点
-                    between_high = recent_df.iloc[first_low_pos:second_low_pos]['close'].max()
+                    between_high = extrema.range_max(base + first_low_pos, base + second_low_pos - 1)
                     # 检查第二个低点后是否突破两低点之间的高点
-                    after_second_low_max = recent_df.iloc[second_low_pos:]['close'].max()
+                    after_second_low_max = extrema.range_max(base + second_low_pos, n - 1)
                     if after_second_low_max > between_high:
                         w_bottom_score = 10
                         reasons.append("底部形态：W型底")
         
         # 圆弧底（10分）：存在至少3个逐步抬升的低点，相邻低点收盘价差值＜3%；整体形态无明显尖峰，低点出现时间跨度≥20个交易日
         arc_bottom_score = 0
-        if len(recent_df) >= 40:  # 需要足够数据判断圆弧底
+        if recent_len >= 40:  # 需要足够数据判断圆弧底
             # 使用滑动窗口找低点
-            window = 5
-            lows = []
-            
-            for i in range(window, len(recent_df) - window):
-                if recent_df.iloc[i]['close'] == recent_df.iloc[i-window:i+window]['close'].min():
-                    lows.append((i, recent_df.iloc[i]['close']))
+            lows = extrema.local_minima(ARC_WINDOW, start=base)
             
             # 检查是否有至少3个逐步抬升的低点
             if len(lows) >= 3:
-                # 检查低点是否逐步抬升且相邻差值＜3%
-                ascending = True
-                valid_lows = True
-                for j in range(1, len(lows)):
-                    if lows[j][1] <= lows[j-1][1] or abs(lows[j][1] - lows[j-1][1]) / lows[j-1][1] >= 0.03:
-                        ascending = False
-                        valid_lows = False
-                        break
+                # 检查低点是否逐步抬升且相邻差值＜3%（默认值，相邻低点整体比较）
+                low_prices = np.array([price for _, price in lows])
+                previous, current = low_prices[:-1], low_prices[1:]
+                invalid = (current <= previous) | (np.abs(current - previous) / previous >= params['arc_low_diff'])
+                valid_lows = not invalid.any()
                 
                 # 检查低点出现时间跨度是否≥20个交易日
-                if valid_lows and (lows[-1][0] - lows[0][0]) >= 20:
+                if valid_lows and (lows[-1][0] - lows[0][0]) >= ARC_MIN_SPAN:
                     arc_bottom_score = 10
                     reasons.append("底部形态：圆弧底")
         
@@ -368,21 +641,8 @@ class StockDataManager:
         total_score += bottom_pattern_score
         
         # --- 评分结果解读 ---
-        if total_score >= 80:
-            status = "【极强多头】"
-            advice = "符合核心选股标准，可重点跟踪布局"
-        elif total_score >= 60:
-            status = "【中度多头】"
-            advice = "趋势明确但强度一般，需等待回调确认支撑"
-        elif total_score >= 40:
-            status = "【震荡整理】"
-            advice = "多空力量均衡，无明确趋势，建议观望"
-        elif total_score >= 20:
-            status = "【中度空头】"
-            advice = "空头占优，避免主动买入"
-        else:
-            status = "【极强空头】"
-            advice = "趋势走弱，需规避风险"
+        status = next((label for level, label in SCORE_LEVELS if total_score >= level), LOWEST_LEVEL)
+        advice = SCORE_ADVICE[status]
         
         return {
             "板块": plate,
@@ -397,23 +657,28 @@ class StockDataManager:
         }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("param", nargs="?", help="process / process_by_date / process_full / import_json，不填则执行特征提取")
+    parser.add_argument("--workers", type=int, default=ANALYSIS_WORKERS, help="分析使用的进程数")
+    args = parser.parse_args()
+
     # 创建 StockDataManager 实例
     manager = StockDataManager(file_path="DayDayHappy.xlsx")
 
     # 根据命令行参数决定执行流程
-    if len(sys.argv) > 1:
-        param = sys.argv[1]
+    if args.param:
+        param = args.param
         if param == "process":
             manager.process_stock_data_to_json(sheet_name="pool")
+        elif param == "process_by_date":
+            manager.process_stock_data_to_json(sheet_name="pool", by_date=True)
+        elif param == "process_full":
+            manager.process_stock_data_to_json(sheet_name="pool", full_refresh=True)
+        elif param == "import_json":
+            manager.data_store.import_json(manager.data_store.legacy_json_path)
         else:
-            print("参数错误，支持：process（处理数据）或 test（测试分析功能）")
+            print("参数错误，支持：process（增量处理数据）、process_by_date（按交易日处理数据）、process_full（全量处理数据）、"
+                  "import_json（从旧版 stocks_data.json 导入数据）或 test（测试分析功能）")
     else:
         # 默认仅执行特征提取
-        manager.extract_features()  
-
-
-
-
-
-
-
+        manager.extract_features(workers=args.workers)